@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Headless batch renderer: texts x parameter sweeps -> .paris / .wav files.
+
+    python batch.py words.txt lists/ -o out --wpm 15 20 25 --freq 600 700 --format paris wav
+    python batch.py manifest.json -o out --per-line
+
+Inputs are .txt files (one text each, or one per line with --per-line),
+directories of .txt files, or a JSON manifest: a list of
+{"name": ..., "text": ...} or {"name": ..., "file": ...} entries.
+Output files are named after the text (the file name without .txt, or
+the manifest "name"), so names must be unique across all inputs.
+Never imports tkinter or pydub.
+"""
+
+import os, sys, json, time, argparse, itertools, collections
+from concurrent.futures import ProcessPoolExecutor
+
+from paris.morse import build_rows
+from paris.audio import synth_iter, write_wav, write_wav_parallel
+from paris.parisfile import header, write_paris
+
+def read_texts(path, per_line=False):
+    """Yield (name, text) for one input path."""
+    if os.path.isdir(path):
+        for fn in sorted(os.listdir(path)):
+            if fn.endswith(".txt"): yield from read_texts(os.path.join(path, fn), per_line)
+        return
+    base = os.path.splitext(os.path.basename(path))[0]
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f: entries = json.load(f)
+        root = os.path.dirname(path)
+        for i, e in enumerate(entries):
+            if "text" in e:
+                yield e.get("name", f"{base}_{i}"), e["text"]
+            else:
+                fp = os.path.join(root, e["file"])
+                yield from _read_txt(fp, e.get("name", os.path.splitext(os.path.basename(fp))[0]), per_line)
+        return
+    yield from _read_txt(path, base, per_line)
+
+def _read_txt(path, name, per_line):
+    with open(path, encoding="utf-8") as f:
+        if per_line:
+            for i, line in enumerate(l.strip() for l in f):
+                if line: yield f"{name}_{i}", line
+        else:
+            yield name, f.read()
+
+def render(job):
+    """Worker: write the requested files for one (name, text, params) job; returns audio seconds."""
+    name, text, (wpm, letsp, wordsp, freq), args = job
+    timing = {k: args[k] for k in ("farns_wpm", "weight", "jitter", "seed")}
+    rows = build_rows(text, wpm, letsp, wordsp, **timing)
+    stem = os.path.join(args["out"], f"{name}_w{wpm:g}_l{letsp:g}_s{wordsp:g}_f{freq:g}")
+    if "paris" in args["formats"]:
+        write_paris(stem + ".paris", rows, header(text, wpm, letsp, wordsp, **timing), binary=args["binary"])
+    if "wav" in args["formats"]:
+        if args["synth_workers"] > 1:
+            write_wav_parallel(stem + ".wav", rows, freq, args["sr"], args["vol"], args["ramp"], args["synth_workers"])
+        else:
+            write_wav(stem + ".wav", synth_iter(rows, freq, args["sr"], args["vol"], args["ramp"]), args["sr"])
+    return rows.total / 1000
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Render Morse practice files without the GUI.")
+    p.add_argument("inputs", nargs="+", help=".txt files, directories of .txt files, or .json manifests")
+    p.add_argument("-o", "--out", default="out")
+    p.add_argument("--per-line", action="store_true", help="each line of a .txt file (incl. manifest files) is its own text")
+    p.add_argument("--wpm", type=float, nargs="+", default=[15])
+    p.add_argument("--letsp", type=float, nargs="+", default=[300], help="letter space (ms)")
+    p.add_argument("--wordsp", type=float, nargs="+", default=[700], help="word space (ms)")
+    p.add_argument("--freq", type=float, nargs="+", default=[700])
+    p.add_argument("--farns", type=float, help="Farnsworth WPM (stretches the gaps)")
+    p.add_argument("--weight", type=float, default=3, help="dash length in dots")
+    p.add_argument("--jitter", type=float, default=0, help="timing jitter in percent")
+    p.add_argument("--seed", type=int, default=0, help="jitter seed, recorded in the .paris header")
+    p.add_argument("--sr", type=int, default=44100)
+    p.add_argument("--vol", type=float, default=0.6)
+    p.add_argument("--ramp", type=float, default=5)
+    p.add_argument("--format", nargs="+", choices=["paris", "wav"], default=["paris", "wav"])
+    p.add_argument("--binary", action="store_true", help="write .paris files in the binary format")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    a = p.parse_args(argv)
+
+    os.makedirs(a.out, exist_ok=True)
+    opts = {"out": a.out, "formats": a.format, "binary": a.binary,
+            "farns_wpm": a.farns, "weight": a.weight, "jitter": a.jitter, "seed": a.seed, "sr": a.sr, "vol": a.vol, "ramp": a.ramp}
+    texts = [t for path in a.inputs for t in read_texts(path, a.per_line)]
+    names = collections.Counter(name for name, _ in texts)
+    dup = sorted(name for name, n in names.items() if n > 1)
+    if dup:
+        # they would write the same files; give manifest entries a "name" or rename the inputs
+        print(f"duplicate output names: {', '.join(dup)}", file=sys.stderr); return 1
+    sweep = list(itertools.product(a.wpm, a.letsp, a.wordsp, a.freq))
+    jobs = [(name, text, params, opts) for name, text in texts for params in sweep]
+    if not jobs:
+        print("nothing to render", file=sys.stderr); return 1
+
+    # fewer files than workers (e.g. one multi-hour text): split each file's synthesis instead
+    opts["synth_workers"] = a.jobs if len(jobs) < a.jobs else 1
+    t = time.perf_counter()
+    if a.jobs > 1 and opts["synth_workers"] == 1:
+        with ProcessPoolExecutor(a.jobs) as ex:
+            secs = sum(ex.map(render, jobs, chunksize=max(1, len(jobs) // (a.jobs * 8))))
+    else:
+        secs = sum(map(render, jobs))
+    dt = time.perf_counter() - t
+    files = len(jobs) * len(a.format)
+    print(f"{files} files, {secs:.1f} s of audio in {dt:.2f} s: "
+          f"{files / dt:.1f} files/s, {secs / dt:.1f} audio-s/s ({a.jobs} workers)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
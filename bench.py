@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Benchmarks for the encode, synth, export and import hot paths.
+
+    python bench.py                          # run, print, write bench.json
+    python bench.py --quick -o new.json --compare bench.json --threshold 0.25
+
+Each case reports its best wall time over --repeat runs, throughput
+(rows/s or samples/s) and peak traced memory of one extra run. With
+--compare, exits 1 if any case is slower than the baseline by more than
+the threshold (0.25 = 25%), and always exits 1 if cold_start (import
+plus first render in a new interpreter) exceeds COLD_START_BUDGET_MS.
+"""
+
+import os, sys, json, time, argparse, subprocess, tempfile, tracemalloc, platform
+
+from paris.morse import build_rows
+from paris.audio import synth, synth_iter, write_wav, write_wav_parallel, element_cache_clear
+from paris.parisfile import header, write_paris, read_paris
+from paris.decode import decode_wav, decode_timeline
+
+# a fresh interpreter importing the core and rendering once; fails if a GUI or MP3 module got pulled in
+COLD_START = ("import sys; from paris import build_rows, synth; synth(build_rows('PARIS', 20, 180, 420)); "
+              "sys.exit(bool({'tkinter', 'pydub'} & set(sys.modules)))")
+COLD_START_BUDGET_MS = 400
+
+WORDS = "THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG 0123456789 PARIS CQ DE KF5JEX".split()
+
+def text_of(n):
+    return " ".join(WORDS[i % len(WORDS)] for i in range(n))
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t)
+    tracemalloc.start()
+    try:
+        fn(); peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def cases(quick, tmp):
+    """Yield (name, fn, work, unit); work is the amount of rows/samples fn processes."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    yield "cold_start", lambda: subprocess.run([sys.executable, "-c", COLD_START], cwd=here, check=True), 1, "runs"
+    for n in ((1, 100, 10000) if quick else (1, 100, 10000, 100000)):
+        text = text_of(n)
+        yield f"build_rows/{n}w", lambda text=text: build_rows(text, 20, 180, 420), len(build_rows(text, 20, 180, 420)), "rows"
+    for sr in (8000, 44100, 48000):
+        for words in ((10,) if quick else (10, 200)):
+            rows = build_rows(text_of(words), 20, 180, 420)
+            ns = int(sr * rows.total / 1000)
+            def run(rows=rows, sr=sr):
+                element_cache_clear(); synth(rows, 700, sr, 0.6, 5)
+            yield f"synth/{sr}/{words}w", run, ns, "samples"
+    rows = build_rows(text_of(50 if quick else 500), 20, 180, 420)
+    ns = int(44100 * rows.total / 1000); wav = os.path.join(tmp, "b.wav")
+    yield "write_wav/stream", lambda: write_wav(wav, synth_iter(rows, 700, 44100, 0.6, 5), 44100), ns, "samples"
+    yield "write_wav/parallel", lambda: write_wav_parallel(wav, rows, 700, 44100, 0.6, 5), ns, "samples"
+    write_wav(wav, synth_iter(rows, 700, 44100, 0.6, 5), 44100)
+    yield "decode_wav", lambda: decode_wav(wav, 700), ns, "samples"
+    big = build_rows(text_of(10000 if quick else 100000), 20, 180, 420)
+    head = header("bench", 20, 180, 420)
+    for binary in (False, True):
+        kind = "bin" if binary else "text"; p = os.path.join(tmp, f"b.{kind}.paris")
+        yield f"paris_export/{kind}", lambda p=p, binary=binary: write_paris(p, big, head, binary), len(big), "rows"
+        write_paris(p, big, head, binary)
+        yield f"paris_import/{kind}", lambda p=p: read_paris(p), len(big), "rows"
+    yield "decode_timeline", lambda: decode_timeline(big), len(big), "rows"
+    graph = headless_graph()
+    if graph:
+        graph.set_timeline(big)
+        yield "redraw_graph", graph.redraw, len(big), "rows"
+        def zoom_pan():
+            graph.zoom(0.5, 300); graph.press(_Ev(300)); graph.motion(_Ev(100))
+        yield "redraw_graph/zoom_pan", zoom_pan, len(big), "rows"
+
+class _Ev:
+    def __init__(self, x): self.x = x
+
+def headless_graph():
+    """A TimingGraph on a withdrawn Tk canvas, or None when there is no display."""
+    try:
+        import tkinter as tk
+        from graph import TimingGraph
+        root = tk.Tk(); root.withdraw()
+    except Exception:
+        return None
+    can = tk.Canvas(root, width=900, height=90); can.pack(); root.update_idletasks()
+    return TimingGraph(can)
+
+def run(quick=False, repeat=3):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="paris_bench_") as tmp:
+        for name, fn, work, unit in cases(quick, tmp):
+            secs, peak = measure(fn, repeat)
+            results[name] = {"seconds": secs, "throughput": work / secs if secs else 0.0,
+                             "unit": f"{unit}/s", "peak_mb": peak / 2**20}
+            print(f"{name:28s} {secs * 1000:10.2f} ms {work / secs if secs else 0:14,.0f} {unit}/s {peak / 2**20:9.2f} MB", flush=True)
+    return results
+
+def compare(results, baseline, threshold):
+    """Names of cases slower than baseline by more than threshold."""
+    slow = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if b and r["seconds"] > b["seconds"] * (1 + threshold):
+            slow.append(name)
+            print(f"REGRESSION {name}: {b['seconds'] * 1000:.2f} ms -> {r['seconds'] * 1000:.2f} ms")
+    return slow
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the Paris Studio hot paths.")
+    p.add_argument("-o", "--out", default="bench.json")
+    p.add_argument("--quick", action="store_true", help="smaller inputs")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--compare", help="baseline JSON from an earlier run")
+    p.add_argument("--threshold", type=float, default=0.25)
+    a = p.parse_args(argv)
+
+    results = run(a.quick, a.repeat)
+    status = 0
+    cold = results["cold_start"]["seconds"] * 1000
+    if cold > COLD_START_BUDGET_MS:
+        print(f"OVER BUDGET cold_start: {cold:.0f} ms > {COLD_START_BUDGET_MS} ms"); status = 1
+    with open(a.out, "w") as f:
+        json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                   "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, f, indent=1)
+    if a.compare:
+        with open(a.compare) as f: baseline = json.load(f)["results"]
+        if compare(results, baseline, a.threshold): return 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
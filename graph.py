@@ -0,0 +1,88 @@
+def key_runs(tl, t0, span, width):
+    """Pixel runs [(x0, x1), ...] with key-down time, for the view [t0, t0 + span) ms over width columns.
+
+    Each column is one bucket; a column is lit if any key-down time falls
+    in it (two O(log n) lookups), so the cost depends on width, not on
+    the length of the timeline.
+    """
+    runs = []; start = None
+    if not tl or span <= 0 or width <= 0: return runs
+    spp = span / width; prev = tl.on_time(t0)
+    for c in range(width):
+        cur = tl.on_time(t0 + (c + 1) * spp)
+        if cur > prev:
+            if start is None: start = c
+        elif start is not None:
+            runs.append((start, c)); start = None
+        prev = cur
+    if start is not None: runs.append((start, width))
+    return runs
+
+class TimingGraph:
+    """Level-of-detail timing graph on a Tk canvas with wheel zoom and drag pan.
+
+    Rectangles are pooled and moved with coords() instead of being
+    recreated, so a redraw touches at most width / 2 items.
+    """
+    MIN_SPAN = 10.0
+
+    def __init__(self, can):
+        self.can = can
+        self.tl = None; self.t0 = 0.0; self.span = 0.0
+        self.pool = []; self.drag = None
+        self.base = can.create_line(0, 80, 0, 80, fill="gray")
+        can.bind("<Configure>", lambda e: self.redraw())
+        can.bind("<MouseWheel>", lambda e: self.zoom(0.8 if e.delta > 0 else 1.25, e.x))
+        can.bind("<Button-4>", lambda e: self.zoom(0.8, e.x))
+        can.bind("<Button-5>", lambda e: self.zoom(1.25, e.x))
+        can.bind("<ButtonPress-1>", self.press)
+        can.bind("<B1-Motion>", self.motion)
+        can.bind("<Double-Button-1>", lambda e: self.reset())
+
+    def set_timeline(self, tl, keep_view=False):
+        full = not self.tl or (self.t0 <= 0 and self.span >= self.tl.total)
+        self.tl = tl
+        if full or not keep_view: self.reset(redraw=False)
+        self.clamp(); self.redraw()
+
+    def reset(self, redraw=True):
+        self.t0 = 0.0; self.span = float(self.tl.total) if self.tl else 0.0
+        if redraw: self.redraw()
+
+    def clamp(self):
+        total = self.tl.total if self.tl else 0
+        self.span = min(max(self.span, min(self.MIN_SPAN, total)), total)
+        self.t0 = min(max(self.t0, 0.0), total - self.span)
+
+    def width(self):
+        return max(1, self.can.winfo_width())
+
+    def x_of(self, t):
+        return (t - self.t0) / self.span * self.width() if self.span else 0
+
+    def zoom(self, factor, x):
+        if not self.span: return
+        t = self.t0 + x / self.width() * self.span
+        self.span *= factor
+        self.t0 = t - x / self.width() * self.span
+        self.clamp(); self.redraw()
+
+    def press(self, e):
+        self.drag = (e.x, self.t0)
+
+    def motion(self, e):
+        if not self.drag or not self.span: return
+        x, t0 = self.drag
+        self.t0 = t0 - (e.x - x) / self.width() * self.span
+        self.clamp(); self.redraw()
+
+    def redraw(self):
+        w = self.width()
+        runs = key_runs(self.tl, self.t0, self.span, w) if self.tl else []
+        self.can.coords(self.base, 0, 80, w, 80)
+        while len(self.pool) < len(runs):
+            self.pool.append(self.can.create_rectangle(0, 0, 0, 0, fill="black", outline=""))
+        for item, (x0, x1) in zip(self.pool, runs):
+            self.can.coords(item, x0, 20, x1, 70); self.can.itemconfigure(item, state="normal")
+        for item in self.pool[len(runs):]:
+            self.can.itemconfigure(item, state="hidden")
@@ -1,19 +1,33 @@
-import os, tempfile, threading, shutil
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
-from morse import build_rows
-from audio import synth, write_wav, play_wav, export_mp3
+from paris.morse import Encoder, build_rows
+from paris.audio import write_wav, encode_mp3, mp3_backend, frames, Player
+from paris.timeline import MorseTimeline
+from paris.parisfile import header, write_paris, read_paris
+from preview import PreviewPane
+from graph import TimingGraph
+from worker import RenderWorker, Exports, tracked, poll_every
+from paris.rendercache import RenderCache, cache_key, timeline_key
+from paris import perf
+
+PREVIEW_DELAY_MS = 150
+POLL_MS = 50
 
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("KF5JEX Paris Studio")
         self.geometry("900x720")
-        self.tmp = None
-        self.playing = False
+        self.player = Player()
+        self.encoder = Encoder(); self.preview_job = None
+        self.mp3 = mp3_backend(); self.cache = RenderCache()
+        self.previewer = RenderWorker("preview"); self.player_worker = RenderWorker("play"); self.play_pending = False
         self.make_ui()
+        self.exports = Exports(self.progress, self.status, messagebox.showinfo, messagebox.showerror)
+        self.bind("<Escape>", lambda e: self.exports.cancel())
         self.update_preview()
+        poll_every(self, (self.previewer, self.exports, self.player_worker), POLL_MS)
 
     def make_ui(self):
         f = ttk.Frame(self, padding=10); f.pack(fill="both", expand=True)
@@ -21,22 +35,22 @@ class App(tk.Tk):
         self.txt = tk.Text(f, height=4, wrap="word")
         self.txt.grid(row=1, column=0, columnspan=6, sticky="nsew")
         self.txt.insert("1.0", "PARIS")
-        self.txt.bind("<<Modified>>", lambda e: (self.txt.edit_modified(0), self.update_preview()))
+        self.txt.bind("<<Modified>>", lambda e: (self.txt.edit_modified(0), self.schedule_preview()))
 
         ttk.Label(f, text="Char WPM:").grid(row=2, column=0, sticky="w")
         self.wpm = tk.StringVar(value="15")
         ttk.Entry(f, textvariable=self.wpm, width=8).grid(row=2, column=1, sticky="w")
-        self.wpm.trace_add("write", lambda *a: self.update_preview())
+        self.wpm.trace_add("write", lambda *a: self.schedule_preview())
 
         ttk.Label(f, text="Letter space (ms):").grid(row=2, column=2, sticky="w")
         self.lspace = tk.StringVar(value="300")
         ttk.Entry(f, textvariable=self.lspace, width=8).grid(row=2, column=3, sticky="w")
-        self.lspace.trace_add("write", lambda *a: self.update_preview())
+        self.lspace.trace_add("write", lambda *a: self.schedule_preview())
 
         ttk.Label(f, text="Word space (ms):").grid(row=2, column=4, sticky="w")
         self.wspace = tk.StringVar(value="700")
         ttk.Entry(f, textvariable=self.wspace, width=8).grid(row=2, column=5, sticky="w")
-        self.wspace.trace_add("write", lambda *a: self.update_preview())
+        self.wspace.trace_add("write", lambda *a: self.schedule_preview())
 
         ttk.Label(f, text="Tone:").grid(row=3, column=0, sticky="w")
         self.freq = tk.StringVar(value="700")
@@ -55,127 +69,186 @@ class App(tk.Tk):
         ttk.Label(f, text="Timing Graph:").grid(row=5, column=0, columnspan=6, sticky="w")
         self.can = tk.Canvas(f, height=90, bg="white", bd=1, relief="sunken")
         self.can.grid(row=6, column=0, columnspan=6, sticky="ew", pady=5)
+        self.graph = TimingGraph(self.can)
 
         self.play_button = ttk.Button(f, text="Start", command=self.toggle_play)
         self.play_button.grid(row=7, column=0, sticky="w", pady=5)
         ttk.Button(f, text="Import .paris", command=self.load_paris).grid(row=7, column=1, sticky="w")
         ttk.Button(f, text="Export .paris", command=self.save_paris).grid(row=7, column=2, sticky="w")
         ttk.Button(f, text="Export WAV", command=self.save_wav).grid(row=7, column=3, sticky="w")
-        ttk.Button(f, text="Export MP3", command=self.save_mp3).grid(row=7, column=4, sticky="w")
+        mp3 = ttk.Button(f, text="Export MP3", command=self.save_mp3)
+        mp3.grid(row=7, column=4, sticky="w")
+        if not self.mp3: mp3.state(["disabled"])
 
         ttk.Label(f, text="Preview:").grid(row=8, column=0, columnspan=6, sticky="w")
-        self.out = tk.Text(f, height=16, wrap="none")
+        self.out = PreviewPane(f, height=16)
         self.out.grid(row=9, column=0, columnspan=6, sticky="nsew")
 
+        self.perf_on = tk.BooleanVar(value=perf.ENABLED)
+        ttk.Checkbutton(f, text="Perf", variable=self.perf_on, command=lambda: perf.enable(self.perf_on.get())).grid(row=10, column=0, sticky="w")
+        self.status = ttk.Label(f, text="" if self.mp3 else "MP3 export unavailable: install ffmpeg or lame.", anchor="w")
+        self.status.grid(row=10, column=1, columnspan=4, sticky="ew")
+        self.progress = ttk.Progressbar(f, maximum=100, length=120)
+        self.progress.grid(row=10, column=5, sticky="e")
+
         f.rowconfigure(9, weight=1)
         for c in range(6): f.columnconfigure(c, weight=1 if c % 2 else 0)
-        self.bind("<Configure>", lambda e: self.redraw_graph())
 
     def toggle_play(self):
-        if self.playing:
-            self.playing = False
+        if self.player.playing or self.play_pending:
+            self.player_worker.cancel(); self.player.stop(); self.play_pending = False
             self.play_button.config(text="Start")
         else:
-            self.playing = True
-            self.play_button.config(text="Stop")
-            threading.Thread(target=self.play_now, daemon=True).start()
+            self.play_now()
 
     def play_now(self):
-        rows, _ = self.build_preview()
-        if not rows:
-            self.playing = False; self.play_button.config(text="Start"); return
-        try:
-            f = float(self.freq.get()); sr = int(self.sr.get())
-            v = float(self.vol.get()); r = float(self.ramp.get())
-        except:
-            self.playing = False; self.play_button.config(text="Start"); return
-
-        if self.tmp: shutil.rmtree(self.tmp, ignore_errors=True)
-        self.tmp = tempfile.mkdtemp(prefix="morse_")
-        wav = os.path.join(self.tmp, "preview.wav")
-        pcm, _ = synth(rows, f, sr, v, r)
-        write_wav(wav, pcm, sr)
-        if self.playing:
-            play_wav(wav)
-        self.playing = False
-        self.play_button.config(text="Start")
-
-    def build_preview(self):
+        p = self.timing(); t = self.tone()
+        if not p or not t: return
+        key = self.render_key(p, t); size = self.cache.size(key)
+        if size:
+            self.start_player(key, p, None, t, size / 2 / t[1]); return
+        self.play_pending = True; self.play_button.config(text="Stop")
+        self.player_worker.submit(lambda job: build_rows(*p), on_done=lambda rows: self.start_player(key, p, rows, t),
+                                  on_error=self.render_failed)
+
+    def start_player(self, key, p, rows, tone, total=None):
+        self.play_pending = False
+        if rows is not None and not rows:
+            self.play_button.config(text="Start"); return
+        sr = tone[1]
+        self.play_total = rows.total / 1000 if total is None else total
+        self.play_button.config(text="Stop")
+        # the player thread renders as it plays, so the op goes with the blocks
+        self.player.play(perf.op_iter("play", self.audio(key, tone, rows, p, chunk_frames=max(1, sr // 50))), sr)
+        self.after(30, self.track_play)
+
+    def render_key(self, p, t):
+        """Cache key of the audio for timing() p and tone() t."""
+        return cache_key("timing", *p, *t)
+
+    def audio(self, key, tone, rows=None, p=None, chunk_frames=8192):
+        # rows=None: key was found cached; rebuild from p if it has been evicted since
+        return self.cache.synth(key, rows if rows is not None else lambda: build_rows(*p), tone, chunk_frames)
+
+    def track_play(self):
+        self.can.delete("cursor")
+        if not self.player.playing:
+            if not self.play_pending: self.play_button.config(text="Start")
+            self.show_perf(["build_rows", "player_spawn", "first_sound", "synth"], self.play_total); return
+        if self.play_total > 0:
+            x = self.graph.x_of(min(self.player.position(), self.play_total) * 1000)
+            self.can.create_line(x, 10, x, 80, fill="red", tags="cursor")
+        self.after(30, self.track_play)
+
+    def show_perf(self, stages, audio_s=None):
+        if perf.ENABLED:
+            c = self.cache.stats()
+            self.status.config(text=f"{perf.summary(stages, audio_s)} | cache {c['hit_rate']:.0%} of "
+                                    f"{c['hits'] + c['disk_hits'] + c['misses']}, {c['mem_bytes'] / 2**20:.1f} MB")
+
+    def timing(self):
+        """(text, wpm, letter space, word space) from the entries, or None if they don't parse."""
         try:
             wpm = float(self.wpm.get()); l = float(self.lspace.get()); w = float(self.wspace.get())
-        except: return [], ""
-        txt = self.txt.get("1.0", "end").strip() or "PARIS"
-        rows = build_rows(txt, wpm, l, w)
-        head = [f"# Word: {txt}", f"# Char speed: {wpm} WPM", f"# Letter space: {l} ms", f"# Word space: {w} ms", "duration_ms,value"]
-        return rows, "\n".join(head + [f"{d},{v}" for d,v in rows])
+        except: return None
+        return self.txt.get("1.0", "end").strip() or "PARIS", wpm, l, w
+
+    def tone(self):
+        try:
+            return float(self.freq.get()), int(self.sr.get()), float(self.vol.get()), float(self.ramp.get())
+        except: return None
+
+    def schedule_preview(self):
+        # coalesce bursts of keystrokes/entry edits into one update
+        if self.preview_job: self.after_cancel(self.preview_job)
+        self.preview_job = self.after(PREVIEW_DELAY_MS, self.update_preview)
 
     def update_preview(self, *a):
-        rows, txt = self.build_preview()
-        self.out.delete("1.0", "end"); self.out.insert("1.0", txt[:5000])
-        self.rows_cache = rows; self.redraw_graph()
-
-    def redraw_graph(self):
-        self.can.delete("all"); rows = getattr(self, "rows_cache", [])
-        if not rows: return
-        w = self.can.winfo_width(); total = sum(d for d,_ in rows)
-        if total <= 0: return
-        scale = w / total; x = 0
-        for d,v in rows:
-            ww = max(1, int(d * scale))
-            if v: self.can.create_rectangle(x, 20, x+ww, 70, fill="black", outline="")
-            x += ww
+        self.preview_job = None
+        p = self.timing()
+        if not p:
+            self.show_preview((MorseTimeline(), [], None)); return
+        self.previewer.submit(self.encode_preview, *p, on_done=self.show_preview, on_error=self.render_failed)
+
+    def encode_preview(self, job, txt, wpm, l, w):
+        # worker thread; self.encoder is only used from here
+        with perf.op("preview"):
+            return self.encoder.build(txt, wpm, l, w), header(txt, wpm, l, w), (txt, wpm, l, w)
+
+    def show_preview(self, result):
+        rows, head, p = result
+        with perf.span("preview_pane"): self.out.set(rows, head, keep_pos=True)
+        self.rows_cache = rows; self.rows_key = p
+        with perf.span("graph"): self.redraw_graph(keep_view=True)
+        self.show_perf(["build_rows", "preview_pane", "graph"])
+
+    def redraw_graph(self, keep_view=False):
+        self.graph.set_timeline(getattr(self, "rows_cache", None), keep_view)
+
+    def export(self, what, path, fn, audio_s=None, stages=()):
+        self.exports.submit(what, path, fn, on_done=lambda: self.show_perf(stages, audio_s() if audio_s else None))
+
+    def render_failed(self, e):
+        if self.play_pending:
+            self.play_pending = False; self.play_button.config(text="Start")
+        messagebox.showerror("Error", str(e))
 
     def save_paris(self):
-        rows, txt = self.build_preview()
-        if not rows: return
+        p = self.timing()
+        if not p: return
         path = filedialog.asksaveasfilename(defaultextension=".paris", filetypes=[("PARIS", "*.paris")])
         if not path: return
-        with open(path, "w", encoding="utf-8") as f: f.write(txt)
-        messagebox.showinfo("Saved", f"Saved {path}")
+        def run(job):
+            rows = build_rows(*p); job.check()
+            write_paris(path, rows, header(*p))
+            return f"Saved {path}"
+        self.export(".paris", path, run)
 
     def load_paris(self):
         path = filedialog.askopenfilename(filetypes=[("PARIS", "*.paris"), ("All files", "*.*")])
         if not path: return
-        rows = []
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#') or line.startswith('duration'):
-                        continue
-                    try:
-                        dur, val = line.split(',')
-                        rows.append((int(float(dur)), int(float(val))))
-                    except: pass
+            errors = []
+            rows, head = read_paris(path, errors)
             if not rows:
                 messagebox.showwarning("Empty file", "No timing data found."); return
-            self.rows_cache = rows
-            self.out.delete("1.0", "end"); self.out.insert("1.0", open(path).read()[:5000])
+            self.rows_cache = rows; self.rows_key = None
+            self.out.set(rows, head)
             self.redraw_graph()
+            if errors:
+                messagebox.showwarning("Malformed lines", f"Skipped {len(errors)} malformed line(s):\n"
+                                       + "\n".join(str(e) for e in errors[:10]))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load file:\n{e}")
 
     def save_wav(self):
-        rows, _ = self.build_preview()
-        if not rows: return
-        try:
-            f = float(self.freq.get()); sr = int(self.sr.get())
-            v = float(self.vol.get()); r = float(self.ramp.get())
-        except: return
+        p = self.timing(); t = self.tone()
+        if not p or not t: return
         out = filedialog.asksaveasfilename(defaultextension=".wav", filetypes=[("WAV", "*.wav")])
         if not out: return
-        pcm, _ = synth(rows, f, sr, v, r); write_wav(out, pcm, sr)
-        messagebox.showinfo("Saved", f"WAV saved:\n{out}")
+        key = self.render_key(p, t); sr = t[1]; length = []
+        def run(job):
+            with perf.op("export_wav"):
+                size = self.cache.size(key)
+                if size is None:
+                    rows = build_rows(*p); size = 2 * sum(frames(rows, sr))
+                else:
+                    rows = None
+                length.append(size / 2 / sr)
+                write_wav(out, tracked(self.audio(key, t, rows, p), job, size), sr)
+            return f"WAV saved:\n{out}"
+        self.export("WAV", out, run, audio_s=lambda: length[0], stages=["build_rows", "synth", "write_wav"])
 
     def save_mp3(self):
-        try:
-            f = float(self.freq.get()); sr = int(self.sr.get())
-            v = float(self.vol.get()); r = float(self.ramp.get())
-        except: return
+        t = self.tone(); rows = getattr(self, "rows_cache", None)
+        if not t or not rows: return
         out = filedialog.asksaveasfilename(defaultextension=".mp3", filetypes=[("MP3", "*.mp3")])
         if not out: return
-        try:
-            export_mp3(self.rows_cache, f, sr, v, r, out)
-            messagebox.showinfo("Saved", f"MP3 saved:\n{out}")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        sr = t[1]
+        p = getattr(self, "rows_key", None)
+        key = self.render_key(p, t) if p else timeline_key(rows, *t)
+        def run(job):
+            with perf.op("export_mp3"):
+                encode_mp3(tracked(self.audio(key, t, rows), job, 2 * sum(frames(rows, sr))), sr, out)
+            return f"MP3 saved:\n{out}"
+        self.export("MP3", out, run, audio_s=lambda: rows.total / 1000, stages=["synth", "encode_mp3"])
@@ -8,53 +8,41 @@ Single-Page Morse Generator + Player
 - Export .paris / .wav / .mp3 (optional)
 """
 
-import os, sys, math, struct, tempfile, shutil, subprocess, threading, random
+import random
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
-try:
-    from pydub import AudioSegment
-    HAVE_PYDUB = True
-except Exception:
-    HAVE_PYDUB = False
+from paris import morse
+from paris.parisfile import header, iter_format_paris, write_paris
+from paris.audio import write_wav, mp3_backend, encode_mp3, frames, Player
+from paris.rendercache import RenderCache, cache_key
+from paris.utils import dot_ms
+from graph import TimingGraph
+from worker import RenderWorker, Exports, tracked, poll_every
 
-MORSE = {
-    "A": ".-", "B": "-...", "C": "-.-.", "D": "-..", "E": ".",
-    "F": "..-.", "G": "--.", "H": "....", "I": "..", "J": ".---",
-    "K": "-.-", "L": ".-..", "M": "--", "N": "-.", "O": "---",
-    "P": ".--.", "Q": "--.-", "R": ".-.", "S": "...", "T": "-",
-    "U": "..-", "V": "...-", "W": ".--", "X": "-..-", "Y": "-.--",
-    "Z": "--..",
-    "0": "-----", "1": ".----", "2": "..---", "3": "...--", "4": "....-",
-    "5": ".....", "6": "-....", "7": "--...", "8": "---..", "9": "----.",
-}
+PREVIEW_CHARS = 5000  # of the .paris text shown; the rest is only formatted on export
 
 def clamp(v, lo, hi): return max(lo, min(hi, v))
-def dot_ms(wpm): return 1200.0 / max(wpm, 1e-9)
-def apply_jitter(d, pct): return d if pct <= 0 else d * (1 + random.uniform(-pct/100, pct/100))
-def which(cmd): return shutil.which(cmd) is not None
 
-def build_rows(text, char_wpm, farns_wpm, weight, jitter, pre, post, letsp, wordsp):
+def ms_params(char_wpm, farns_wpm, letsp, wordsp):
+    # letsp/wordsp are in Farnsworth dots; morse.build_rows takes ms at character speed
     char_wpm = clamp(char_wpm, 1, 80)
     farns_wpm = clamp(farns_wpm, 1, char_wpm)
-    d_dot = dot_ms(char_wpm); d_f = dot_ms(farns_wpm)
-    d_dash = weight * d_dot
-    d_intra = d_dot
-    d_ich = letsp * d_f
-    d_iw = wordsp * d_f
-    rows = []
-    if pre: rows.append((int(pre), 0))
-    for wi, w in enumerate(text.strip().split()):
-        for ci, ch in enumerate(w):
-            code = MORSE.get(ch.upper())
-            if not code: continue
-            for ei, e in enumerate(code):
-                rows.append((int(apply_jitter(d_dot if e == "." else d_dash, jitter)), 1))
-                if ei < len(code) - 1: rows.append((int(apply_jitter(d_intra, jitter)), 0))
-            if ci < len(w) - 1: rows.append((int(apply_jitter(d_ich, jitter)), 0))
-        if wi < len(text.split()) - 1: rows.append((int(apply_jitter(d_iw, jitter)), 0))
-    if post: rows.append((int(post), 0))
-    return rows
+    d_dot = dot_ms(char_wpm)
+    return char_wpm, farns_wpm, letsp * d_dot, wordsp * d_dot
+
+def build_rows(text, char_wpm, farns_wpm, weight, jitter, pre, post, letsp, wordsp, seed=None):
+    char_wpm, farns_wpm, letsp_ms, wordsp_ms = ms_params(char_wpm, farns_wpm, letsp, wordsp)
+    return morse.build_rows(text, char_wpm, letsp_ms, wordsp_ms, farns_wpm=farns_wpm, weight=weight,
+                            jitter=jitter, seed=seed, pre=pre, post=post)
+
+def encode(text, char_wpm, farns_wpm, weight, jitter, pre, post, letsp, wordsp, seed=None):
+    """(rows, header lines) for the studio's entry values; the header ends with the effective WPM."""
+    rows = build_rows(text, char_wpm, farns_wpm, weight, jitter, pre, post, letsp, wordsp, seed)
+    c, f, l_ms, w_ms = ms_params(char_wpm, farns_wpm, letsp, wordsp)
+    eff = estimate_eff(char_wpm, farns_wpm, weight, letsp, wordsp)
+    head = header(text, c, l_ms, w_ms, farns_wpm=f, weight=weight, jitter=jitter, seed=seed, pre=pre, post=post)
+    return rows, head + [f"# Effective WPM: {eff:.2f}"]
 
 def estimate_eff(char, farns, weight, letsp, wordsp):
     if char <= 0 or farns <= 0: return 0
@@ -63,42 +51,19 @@ def estimate_eff(char, farns, weight, letsp, wordsp):
     tot = 50 * avg * space
     return (60000 * 50) / tot if tot > 0 else char
 
-def synth(rows, freq=700, sr=44100, vol=0.5, ramp=5):
-    ramp_s = int(sr * (ramp / 1000))
-    b = bytearray(); tp = 0
-    for dur, val in rows:
-        n = int(sr * (dur / 1000))
-        if val:
-            for i in range(n):
-                if ramp_s > 0:
-                    if i < ramp_s:
-                        env = 0.5 * (1 - math.cos(math.pi * i / ramp_s))
-                    elif n - i <= ramp_s:
-                        env = 0.5 * (1 - math.cos(math.pi * (n - i) / ramp_s))
-                    else:
-                        env = 1
-                else:
-                    env = 1
-                s = vol * env * math.sin(2 * math.pi * freq * tp / sr)
-                b += struct.pack('<h', int(32767 * max(-1, min(1, s))))
-                tp += 1
-        else:
-            b += b'\x00\x00' * n; tp += n
-    return bytes(b), tp
-
-def write_wav(p, pcm, sr=44100):
-    import wave
-    with wave.open(p, 'wb') as w:
-        w.setnchannels(1); w.setsampwidth(2); w.setframerate(sr); w.writeframes(pcm)
-
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Morse Generator + Player")
         self.geometry("950x750")
-        self.tmp = None
+        self.cache = RenderCache(); self.player = Player()
+        self.seed = random.randrange(2**31)  # one jitter pattern per session, recorded in exports
+        self.previewer = RenderWorker("preview"); self.player_worker = RenderWorker("play")
         self.make_ui()
+        self.exports = Exports(self.progress, self.status, messagebox.showinfo, messagebox.showerror)
+        self.bind("<Escape>", lambda e: self.exports.cancel())
         self.update_preview()
+        poll_every(self, (self.previewer, self.exports, self.player_worker))
 
     def make_ui(self):
         f = ttk.Frame(self, padding=10); f.pack(fill="both", expand=True)
@@ -137,6 +102,7 @@ class App(tk.Tk):
         ttk.Label(f, text="Timing Graph:").grid(row=6, column=0, columnspan=8, sticky="w")
         self.can = tk.Canvas(f, height=90, bg="white", bd=1, relief="sunken")
         self.can.grid(row=7, column=0, columnspan=8, sticky="ew", pady=5)
+        self.graph = TimingGraph(self.can)
 
         b = ttk.Frame(f); b.grid(row=8, column=0, columnspan=8, sticky="w", pady=5)
         ttk.Button(b, text="Play", command=self.play_now).pack(side="left", padx=4)
@@ -146,9 +112,12 @@ class App(tk.Tk):
 
         ttk.Label(f, text="Preview:").grid(row=9, column=0, columnspan=8, sticky="w")
         self.out = tk.Text(f, height=16, wrap="none"); self.out.grid(row=10, column=0, columnspan=8, sticky="nsew")
+        self.status = ttk.Label(f, text="", anchor="w")
+        self.status.grid(row=11, column=0, columnspan=7, sticky="ew")
+        self.progress = ttk.Progressbar(f, maximum=100, length=120)
+        self.progress.grid(row=11, column=7, sticky="e")
         f.rowconfigure(10, weight=1)
         for c in range(8): f.columnconfigure(c, weight=1 if c % 2 else 0)
-        self.bind("<Configure>", lambda e: self.redraw_graph())
 
     def parse(self):
         vals = []
@@ -157,105 +126,90 @@ class App(tk.Tk):
             except: vals.append(0)
         return vals
 
-    def build_preview(self):
-        vals = self.parse()
-        if len(vals) < 8: return [], ""
-        char, farns, w, j, l, wsp, pre, post = vals
+    def params(self):
+        """encode() arguments from the widgets; read on the Tk thread, passed to the workers."""
+        char, farns, w, j, l, wsp, pre, post = self.parse()
         txt = self.txt.get("1.0", "end").strip() or "PARIS"
-        rows = build_rows(txt, char, farns, w, j, pre, post, l, wsp)
-        eff = estimate_eff(char, farns, w, l, wsp)
-        head = [
-            f"# Word: {txt}",
-            f"# Char speed: {char} WPM",
-            f"# Farnsworth: {farns} WPM",
-            f"# Effective WPM: {eff:.2f}",
-            "duration_ms,value",
-        ]
-        return rows, "\n".join(head + [f"{d},{v}" for d, v in rows])
+        return txt, char, farns, w, j, pre, post, l, wsp
 
     def update_preview(self, *a):
-        rows, txt = self.build_preview()
+        self.previewer.submit(self.encode_preview, self.params(), on_done=self.show_preview, on_error=self.render_failed)
+
+    def encode_preview(self, job, p):
+        # worker thread: encode, and format only as much .paris text as the pane shows
+        rows, head = encode(*p, seed=self.seed)
+        text = []; n = 0
+        for piece in iter_format_paris(rows, head, chunk_rows=256):
+            job.check()
+            text.append(piece); n += len(piece)
+            if n >= PREVIEW_CHARS: break
+        return rows, head, "".join(text)[:PREVIEW_CHARS]
+
+    def show_preview(self, result):
+        rows, head, text = result
         self.out.delete("1.0", "end")
-        self.out.insert("1.0", txt[:5000])
-        eff_line = next((l for l in txt.splitlines() if "Effective WPM" in l), None)
-        if eff_line: self.lbl.config(text=eff_line)
-        self.rows_cache = rows
-        self.redraw_graph()
+        self.out.insert("1.0", text)
+        self.lbl.config(text=head[-1])
+        self.graph.set_timeline(rows, keep_view=True)
 
-    def redraw_graph(self):
-        self.can.delete("all")
-        rows = getattr(self, "rows_cache", [])
-        if not rows: return
-        w = self.can.winfo_width()
-        total = sum(d for d, _ in rows)
-        if total <= 0: return
-        scale = w / total
-        x = 0
-        self.can.create_line(0, 80, w, 80, fill="gray")
-        for d, v in rows:
-            ww = max(1, int(d * scale))
-            if v:
-                self.can.create_rectangle(x, 20, x + ww, 70, fill="black", outline="")
-            x += ww
-
-    def play_now(self):
-        rows, _ = self.build_preview()
-        if not rows: return
+    def tone(self):
         try:
-            f = float(self.freq.get()); sr = int(self.sr.get()); v = float(self.vol.get()); r = float(self.ramp.get())
-        except: return
-        if self.tmp: shutil.rmtree(self.tmp, ignore_errors=True)
-        self.tmp = tempfile.mkdtemp(prefix="morse_")
-        wav = os.path.join(self.tmp, "preview.wav")
-        pcm, _ = synth(rows, f, sr, v, r); write_wav(wav, pcm, sr)
-        threading.Thread(target=self._play, args=(wav,), daemon=True).start()
+            return float(self.freq.get()), int(self.sr.get()), clamp(float(self.vol.get()), 0, 1), float(self.ramp.get())
+        except: return None
 
-    def _play(self, wav):
-        try:
-            if sys.platform.startswith("win"):
-                import winsound; winsound.PlaySound(wav, winsound.SND_FILENAME)
-            elif sys.platform == "darwin" and which("afplay"):
-                subprocess.run(["afplay", wav])
-            elif which("aplay"):
-                subprocess.run(["aplay", wav])
-        except: pass
+    def audio_key(self, p, t):
+        # everything that determines the rendered audio, incl. the session's jitter seed
+        return cache_key("studio", *p, self.seed, *t)
+
+    def audio(self, key, p, t, rows=None, chunk_frames=8192):
+        return self.cache.synth(key, rows if rows is not None else lambda: encode(*p, seed=self.seed)[0], t, chunk_frames)
+
+    def play_now(self):
+        p = self.params(); t = self.tone()
+        if not t: return
+        key = self.audio_key(p, t); chunk = max(1, t[1] // 50)
+        if self.cache.size(key):
+            self.player.play(self.audio(key, p, t, chunk_frames=chunk), t[1]); return
+        # encode off the Tk thread; the player thread then synthesizes as it plays
+        self.player_worker.submit(lambda job: encode(*p, seed=self.seed)[0],
+                                  on_done=lambda rows: self.player.play(self.audio(key, p, t, rows, chunk), t[1]),
+                                  on_error=self.render_failed)
+
+    def render_failed(self, e):
+        messagebox.showerror("Error", str(e))
 
     def save_paris(self):
-        rows, txt = self.build_preview()
-        if not rows: return
+        p = self.params()
         path = filedialog.asksaveasfilename(defaultextension=".paris", filetypes=[("PARIS", "*.paris")])
         if not path: return
-        with open(path, "w", encoding="utf-8") as f: f.write(txt)
-        messagebox.showinfo("Saved", f"Saved {path}")
+        def run(job):
+            rows, head = encode(*p, seed=self.seed); job.check()
+            write_paris(path, rows, head)
+            return f"Saved {path}"
+        self.exports.submit(".paris", path, run)
+
+    def save_audio(self, what, ext, write):
+        p = self.params(); t = self.tone()
+        if not t: return
+        out = filedialog.asksaveasfilename(defaultextension=ext, filetypes=[(what, "*" + ext)])
+        if not out: return
+        key = self.audio_key(p, t); sr = t[1]
+        def run(job):
+            size = self.cache.size(key); rows = None
+            if size is None:
+                rows = encode(*p, seed=self.seed)[0]; size = 2 * sum(frames(rows, sr))
+            write(tracked(self.audio(key, p, t, rows), job, size), sr, out)
+            return f"{what} saved:\n{out}"
+        self.exports.submit(what, out, run)
 
     def save_wav(self):
-        rows, _ = self.build_preview()
-        if not rows: return
-        try:
-            f = float(self.freq.get()); sr = int(self.sr.get()); v = float(self.vol.get()); r = float(self.ramp.get())
-        except: return
-        out = filedialog.asksaveasfilename(defaultextension=".wav", filetypes=[("WAV", "*.wav")])
-        if not out: return
-        pcm, _ = synth(rows, f, sr, v, r); write_wav(out, pcm, sr)
-        messagebox.showinfo("Saved", f"WAV saved:\n{out}")
+        self.save_audio("WAV", ".wav", lambda chunks, sr, out: write_wav(out, chunks, sr))
 
     def save_mp3(self):
-        if not HAVE_PYDUB:
-            messagebox.showwarning("MP3 not available", "Install pydub+ffmpeg for MP3 export.")
+        if not mp3_backend():
+            messagebox.showwarning("MP3 not available", "Install ffmpeg or lame for MP3 export.")
             return
-        rows, _ = self.build_preview()
-        if not rows: return
-        try:
-            f = float(self.freq.get()); sr = int(self.sr.get()); v = float(self.vol.get()); r = float(self.ramp.get())
-        except: return
-        out = filedialog.asksaveasfilename(defaultextension=".mp3", filetypes=[("MP3", "*.mp3")])
-        if not out: return
-        tmp = tempfile.mkdtemp(prefix="morse_")
-        wav = os.path.join(tmp, "t.wav")
-        pcm, _ = synth(rows, f, sr, v, r); write_wav(wav, pcm, sr)
-        AudioSegment.from_wav(wav).export(out, format="mp3")
-        shutil.rmtree(tmp, ignore_errors=True)
-        messagebox.showinfo("Saved", f"MP3 saved:\n{out}")
+        self.save_audio("MP3", ".mp3", encode_mp3)
 
 if __name__ == "__main__":
     App().mainloop()
@@ -0,0 +1,18 @@
+"""Paris Studio core: Morse timing, tone synthesis and the .paris formats.
+
+Headless and GUI-free: importing it never loads tkinter, pydub or an
+encoder; MP3 backends and audio players are looked up on first use.
+
+    from paris import build_rows, synth, write_wav
+    write_wav("paris.wav", synth(build_rows("PARIS", 20, 180, 420))[0])
+
+Submodules not imported here: decode (WAV/.paris -> text), rendercache.
+"""
+
+from .timeline import MorseTimeline
+from .morse import MORSE, Encoder, build_rows
+from .audio import synth, synth_iter, write_wav
+from .parisfile import header, read_paris, write_paris
+
+__all__ = ["MorseTimeline", "MORSE", "Encoder", "build_rows", "synth", "synth_iter", "write_wav",
+           "header", "read_paris", "write_paris"]
@@ -0,0 +1,13 @@
+"""python -m paris in.paris out.paris [--binary|--text]: convert between the .paris formats."""
+
+import argparse
+
+from .parisfile import convert_paris
+
+p = argparse.ArgumentParser(prog="python -m paris", description="Convert .paris files between the text and binary formats.")
+p.add_argument("src"); p.add_argument("dst")
+g = p.add_mutually_exclusive_group()
+g.add_argument("--binary", action="store_true", dest="binary", default=None)
+g.add_argument("--text", action="store_false", dest="binary")
+a = p.parse_args()
+convert_paris(a.src, a.dst, a.binary)
@@ -0,0 +1,406 @@
+import os, sys, math, mmap, struct, subprocess, tempfile, shutil, functools, shlex, threading, time
+from array import array
+from collections import OrderedDict
+from fractions import Fraction
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except Exception:
+    HAVE_NUMPY = False
+
+from .utils import which
+from .timeline import MorseTimeline
+from . import perf
+
+def _ramp_np(ramp_s):
+    # env value for distance k from the tone edge, k = 0..ramp_s
+    return 0.5 * (1 - np.cos(np.pi * np.arange(ramp_s + 1) / ramp_s))
+
+def _env_np(n, ramp_s):
+    env = np.ones(n)
+    if ramp_s > 0:
+        rup = _ramp_np(ramp_s)
+        h = min(ramp_s, n); env[:h] = rup[:h]
+        t0 = max(ramp_s, n - ramp_s)
+        if t0 < n: env[t0:] = rup[n - t0:0:-1]
+    return env
+
+def _tone_np(n, tp, freq, sr, vol, ramp_s):
+    s = vol * _env_np(n, ramp_s) * np.sin(2 * math.pi * freq * np.arange(tp, tp + n, dtype=np.float64) / sr)
+    return (32767 * np.clip(s, -1, 1)).astype('<i2').tobytes()
+
+def _tone_py(n, tp, freq, sr, vol, ramp_s):
+    out = []
+    for i in range(n):
+        if ramp_s > 0:
+            if i < ramp_s:
+                env = 0.5 * (1 - math.cos(math.pi * i / ramp_s))
+            elif n - i <= ramp_s:
+                env = 0.5 * (1 - math.cos(math.pi * (n - i) / ramp_s))
+            else:
+                env = 1
+        else:
+            env = 1
+        s = vol * env * math.sin(2 * math.pi * freq * (tp + i) / sr)
+        out.append(int(32767 * s))
+    return struct.pack(f'<{n}h', *out)
+
+# Element cache. A tone's samples depend on its start index tp only through
+# the sine phase, which repeats every _period() samples, so tones are cached
+# per phase residue when that period is short (700 Hz @ 44.1k -> 63) and as
+# an (env*sin, env*cos) pair rotated to the start phase otherwise. Entries
+# are whole tones, and jittered or imported timelines give nearly every
+# element its own length, so the cache is bounded by bytes, not entries,
+# and tones over ELEMENT_MAX_BYTES are never kept.
+ELEMENT_CACHE_BYTES = int(float(os.environ.get("PARIS_ELEMENT_CACHE_MB", 16)) * 2**20)
+ELEMENT_MAX_BYTES = ELEMENT_CACHE_BYTES // 16
+PHASE_PERIOD_MAX = 1024
+
+class _ElementCache:
+    """Least-recently-used tones, bounded by their total size in bytes; thread-safe."""
+    def __init__(self, max_bytes, sizeof):
+        self.max_bytes = max_bytes; self.sizeof = sizeof
+        self.items = OrderedDict(); self.bytes = 0
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, make):
+        with self.lock:
+            v = self.items.get(key)
+            if v is not None:
+                self.items.move_to_end(key); self.hits += 1
+                return v
+            self.misses += 1
+        v = make(); n = self.sizeof(v)
+        if n <= min(ELEMENT_MAX_BYTES, self.max_bytes):
+            with self.lock:
+                if key not in self.items:
+                    self.items[key] = v; self.bytes += n
+                    while self.bytes > self.max_bytes:
+                        _, old = self.items.popitem(last=False); self.bytes -= self.sizeof(old)
+        return v
+
+    def clear(self):
+        with self.lock: self.items.clear(); self.bytes = 0; self.hits = self.misses = 0
+
+_elements = _ElementCache(ELEMENT_CACHE_BYTES, len)
+_elements_iq = _ElementCache(ELEMENT_CACHE_BYTES, lambda sc: sc[0].nbytes + sc[1].nbytes)
+
+@functools.lru_cache(maxsize=64)
+def _period(freq, sr):
+    return (Fraction(freq) / Fraction(sr)).denominator
+
+def _element_iq(n, freq, sr, vol, ramp_s):
+    w = 2 * math.pi * freq * np.arange(n, dtype=np.float64) / sr
+    e = vol * _env_np(n, ramp_s)
+    return e * np.sin(w), e * np.cos(w)
+
+def tone(n, tp, freq=700, sr=44100, vol=0.5, ramp_s=0):
+    """int16 PCM for an n-sample key-down element starting at sample index tp."""
+    if _period(freq, sr) <= PHASE_PERIOD_MAX:
+        phase = tp % _period(freq, sr); make = _tone_np if HAVE_NUMPY else _tone_py
+        return _elements.get((n, phase, freq, sr, vol, ramp_s, HAVE_NUMPY), lambda: make(n, phase, freq, sr, vol, ramp_s))
+    if not HAVE_NUMPY:
+        return _tone_py(n, tp, freq, sr, vol, ramp_s)
+    s, c = _elements_iq.get((n, freq, sr, vol, ramp_s), lambda: _element_iq(n, freq, sr, vol, ramp_s))
+    th = 2 * math.pi * freq * tp / sr
+    return (32767 * np.clip(s * math.cos(th) + c * math.sin(th), -1, 1)).astype('<i2').tobytes()
+
+def element_cache_info():
+    a, b = _elements, _elements_iq
+    hits = a.hits + b.hits; misses = a.misses + b.misses
+    return {"hits": hits, "misses": misses, "size": len(a.items) + len(b.items), "bytes": a.bytes + b.bytes,
+            "max_bytes": ELEMENT_CACHE_BYTES, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+
+def element_cache_clear():
+    _elements.clear(); _elements_iq.clear()
+
+def frames(tl, sr):
+    """Sample count per timeline element, int(sr * (dur / 1000)) as synth() has always rounded."""
+    if HAVE_NUMPY:
+        return (sr * (np.frombuffer(tl.durations, dtype=np.uint32) / 1000)).astype(np.int64).tolist()
+    return [int(sr * (dur / 1000)) for dur in tl.durations]
+
+def synth(rows, freq=700, sr=44100, vol=0.5, ramp=5):
+    """rows is a MorseTimeline (any (duration_ms, value) sequence is converted)."""
+    with perf.span("synth"):
+        tl = MorseTimeline.from_rows(rows)
+        ramp_s = int(sr * (ramp / 1000))
+        parts = []; tp = 0
+        for n, val in zip(frames(tl, sr), tl.values()):
+            parts.append(tone(n, tp, freq, sr, vol, ramp_s) if val else bytes(2 * n))
+            tp += n
+        pcm = b''.join(parts)
+    perf.count("samples", tp)
+    return pcm, tp
+
+def synth_iter(rows, freq=700, sr=44100, vol=0.5, ramp=5, chunk_frames=8192):
+    """Yield the same PCM as synth() in blocks of chunk_frames samples (the last may be shorter)."""
+    t = time.perf_counter(); busy = 0.0  # time spent here, not in the consumer
+    tl = MorseTimeline.from_rows(rows)
+    ramp_s = int(sr * (ramp / 1000))
+    buf = bytearray(); room = chunk_frames; tp = 0
+    for n, val in zip(frames(tl, sr), tl.values()):
+        k = 0
+        pcm = memoryview(tone(n, tp, freq, sr, vol, ramp_s)) if val else None
+        while k < n:
+            m = min(n - k, room)
+            buf += pcm[2 * k:2 * (k + m)] if val else bytes(2 * m)
+            k += m; room -= m
+            if not room:
+                busy += time.perf_counter() - t
+                yield bytes(buf); buf = bytearray(); room = chunk_frames
+                t = time.perf_counter()
+        tp += n
+    perf.add("synth", busy + time.perf_counter() - t); perf.count("samples", tp)
+    if buf: yield bytes(buf)
+
+def write_wav(p, pcm, sr=44100):
+    """pcm is either one bytes block or an iterable of blocks (e.g. synth_iter), written as they arrive."""
+    import wave
+    busy = 0.0  # time spent writing, not producing the blocks
+    with wave.open(p, 'wb') as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(sr)
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            pcm = (pcm,)
+        for block in pcm:
+            t = time.perf_counter(); w.writeframesraw(block); busy += time.perf_counter() - t
+    perf.add("write_wav", busy)
+
+# Parallel synthesis. Every element's samples depend only on its length and
+# start index tp (see tone()), and tp is the running sum of frames(), so any
+# run of elements can be rendered on its own straight into its slice of a
+# preallocated file. Runs are cut after key-up gaps and sized by samples.
+WAV_HEAD = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+def wav_header(n, sr):
+    """The 44-byte header write_wav() produces for n mono 16-bit samples, for streaming a WAV of known length."""
+    return WAV_HEAD.pack(b"RIFF", 36 + 2 * n, b"WAVE", b"fmt ", 16, 1, 1, sr, 2 * sr, 2, 16, b"data", 2 * n)
+
+def split_runs(ns, vals, parts):
+    """Element index bounds [0, ..., len(ns)] of about `parts` runs of equal sample count, each ending on a gap."""
+    total = sum(ns); bounds = [0]; acc = 0
+    for i, (n, v) in enumerate(zip(ns, vals)):
+        acc += n
+        if not v and acc >= total * len(bounds) / parts and i + 1 < len(ns):
+            bounds.append(i + 1)
+    bounds.append(len(ns))
+    return bounds
+
+def _render_run(path, offset, tp, ns, vals, freq, sr, vol, ramp_s):
+    # pool worker: write the key-down elements of one run into the mapped file; gaps are already zero
+    with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+        for n, v in zip(ns, vals):
+            if v and n:
+                a = offset + 2 * tp; mm[a:a + 2 * n] = tone(n, tp, freq, sr, vol, ramp_s)
+            tp += n
+    return tp
+
+def render_into(path, offset, rows, freq=700, sr=44100, vol=0.5, ramp=5, workers=None):
+    """Render rows into path at byte offset, which must already be sized to hold them; returns the sample count.
+
+    With workers > 1 the runs go to a process pool, each worker mapping the
+    file itself, so no PCM passes between processes.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    tl = MorseTimeline.from_rows(rows)
+    ns = frames(tl, sr); vals = tl.values(); ramp_s = int(sr * (ramp / 1000))
+    workers = workers or os.cpu_count() or 1
+    bounds = split_runs(ns, vals, workers * 4 if workers > 1 else 1)
+    starts = [0]
+    for a, b in zip(bounds, bounds[1:]): starts.append(starts[-1] + sum(ns[a:b]))
+    runs = [(path, offset, starts[k], array("q", ns[a:b]), vals[a:b], freq, sr, vol, ramp_s)
+            for k, (a, b) in enumerate(zip(bounds, bounds[1:]))]
+    with perf.span("synth"):
+        if workers > 1 and len(runs) > 1:
+            with ProcessPoolExecutor(min(workers, len(runs))) as ex:
+                list(ex.map(_render_run, *zip(*runs)))
+        else:
+            for r in runs: _render_run(*r)
+    perf.count("samples", starts[-1])
+    return starts[-1]
+
+def write_wav_parallel(p, rows, freq=700, sr=44100, vol=0.5, ramp=5, workers=None):
+    """Same file as write_wav(p, synth(rows, ...)[0], sr), rendered in place by `workers` processes; returns the sample count."""
+    tl = MorseTimeline.from_rows(rows)
+    size = 2 * sum(frames(tl, sr))
+    with open(p, "wb") as f:
+        f.write(wav_header(size // 2, sr))
+        f.truncate(WAV_HEAD.size + size)
+    if not size: return 0
+    return render_into(p, WAV_HEAD.size, tl, freq, sr, vol, ramp, workers)
+
+def synth_parallel(rows, freq=700, sr=44100, vol=0.5, ramp=5, workers=None):
+    """synth() on several processes: bit-identical (pcm, tp), staged through one mapped temp file."""
+    tl = MorseTimeline.from_rows(rows)
+    size = 2 * sum(frames(tl, sr))
+    fd, tmp = tempfile.mkstemp(prefix="paris_synth_")
+    try:
+        with os.fdopen(fd, "r+b") as f:
+            f.truncate(size)
+            tp = render_into(tmp, 0, tl, freq, sr, vol, ramp, workers) if size else 0
+            f.seek(0); return f.read(), tp
+    finally:
+        os.remove(tmp)
+
+def play_wav(path):
+    try:
+        if sys.platform.startswith("win"):
+            import winsound; winsound.PlaySound(path, winsound.SND_FILENAME)
+        elif sys.platform == "darwin" and which("afplay"):
+            subprocess.run(["afplay", path])
+        elif which("aplay"):
+            subprocess.run(["aplay", path])
+    except:
+        pass
+
+def player_cmd(sr):
+    """Command that plays raw mono S16_LE PCM from stdin, or None. $PARIS_PLAYER overrides ({sr} is filled in)."""
+    if os.environ.get("PARIS_PLAYER"):
+        return shlex.split(os.environ["PARIS_PLAYER"].format(sr=sr))
+    if which("aplay"):
+        return ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-c", "1", "-r", str(sr), "-"]
+    if which("ffplay"):
+        return ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-f", "s16le", "-ar", str(sr), "-ac", "1", "-i", "-"]
+    if which("play"):
+        return ["play", "-q", "-t", "raw", "-r", str(sr), "-e", "signed", "-b", "16", "-c", "1", "-"]
+    return None
+
+class Player:
+    """Streams PCM blocks into a player process's stdin from a background thread.
+
+    Sound starts as soon as the first block is written; stop() kills the
+    player so playback ends within one block. cmd may be a list or a
+    callable taking sr; by default player_cmd() is used, falling back to a
+    temp WAV and play_wav() when no stdin-capable player exists.
+    """
+    def __init__(self, cmd=None):
+        self.cmd = cmd
+        self.proc = None; self.thread = None
+        self.frames = 0; self.sr = 44100; self.t0 = None
+        self._stop = threading.Event()
+
+    @property
+    def playing(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def play(self, chunks, sr=44100, on_done=None):
+        self.stop()
+        self.sr = sr; self.frames = 0; self.t0 = None; self._stop.clear()
+        self.thread = threading.Thread(target=self._run, args=(chunks, sr, on_done), daemon=True)
+        self.thread.start()
+
+    def position(self):
+        """Seconds of audio played so far (wall time since the first block, capped at what was written)."""
+        if self.t0 is None: return 0.0
+        return min(time.monotonic() - self.t0, self.frames / self.sr)
+
+    def stop(self):
+        self._stop.set()
+        p = self.proc
+        if p and p.poll() is None:
+            try: p.kill()
+            except OSError: pass
+        if sys.platform.startswith("win") and self.cmd is None:
+            try:
+                import winsound; winsound.PlaySound(None, 0)
+            except Exception: pass
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(1.0)
+
+    def _run(self, chunks, sr, on_done):
+        start = time.monotonic()
+        cmd = self.cmd(sr) if callable(self.cmd) else self.cmd or player_cmd(sr)
+        try:
+            if cmd is None:
+                self._run_file(chunks, sr)
+            else:
+                with perf.span("player_spawn"):
+                    self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                for block in chunks:
+                    if self._stop.is_set(): break
+                    if self.t0 is None:
+                        self.t0 = time.monotonic(); perf.add("first_sound", self.t0 - start)
+                    self.proc.stdin.write(block); self.frames += len(block) // 2
+                self.proc.stdin.close()
+                if self._stop.is_set(): self.proc.kill()
+                self.proc.wait()
+        except (OSError, ValueError):
+            pass
+        finally:
+            p, self.proc = self.proc, None
+            if p:
+                if p.poll() is None: p.kill()
+                p.wait()
+            if on_done: on_done()
+
+    def _run_file(self, chunks, sr):
+        tmp = tempfile.mkdtemp(prefix="morse_")
+        try:
+            wav = os.path.join(tmp, "preview.wav")
+            write_wav(wav, chunks, sr)
+            if not self._stop.is_set():
+                import wave
+                with wave.open(wav) as w: self.frames = w.getnframes()
+                self.t0 = time.monotonic(); play_wav(wav)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+def mp3_backend():
+    """Which MP3 encoder export_mp3() will use: 'custom' ($PARIS_MP3_ENCODER), 'ffmpeg', 'lame', 'pydub' or None."""
+    if os.environ.get("PARIS_MP3_ENCODER"): return "custom"
+    if which("ffmpeg"): return "ffmpeg"
+    if which("lame"): return "lame"
+    import importlib.util
+    if importlib.util.find_spec("pydub"): return "pydub"
+    return None
+
+def mp3_encoder_cmd(backend, sr, outpath, kbps=128):
+    """Command reading raw mono S16_LE PCM on stdin and writing outpath; $PARIS_MP3_ENCODER gets {sr}, {out}, {kbps}."""
+    if backend == "custom":
+        return shlex.split(os.environ["PARIS_MP3_ENCODER"].format(sr=sr, out=outpath, kbps=kbps))
+    if backend == "ffmpeg":
+        return ["ffmpeg", "-loglevel", "error", "-y", "-f", "s16le", "-ar", str(sr), "-ac", "1", "-i", "-",
+                "-codec:a", "libmp3lame", "-b:a", f"{kbps}k", outpath]
+    if backend == "lame":
+        return ["lame", "--quiet", "-r", "-s", f"{sr / 1000:g}", "--bitwidth", "16", "--signed", "--little-endian",
+                "-m", "m", "-b", str(kbps), "-", outpath]
+    return None
+
+def _remove(path):
+    try: os.remove(path)
+    except OSError: pass
+
+def encode_mp3(chunks, sr, outpath, kbps=128):
+    """Encode PCM blocks to MP3 by piping them into the encoder's stdin; no intermediate WAV."""
+    backend = mp3_backend()
+    if backend is None:
+        raise RuntimeError("MP3 export needs ffmpeg or lame on PATH (or pydub).")
+    if backend == "pydub":
+        from pydub import AudioSegment  # imported here so headless renders never load it
+        pcm = b"".join(chunks)
+        AudioSegment(data=pcm, sample_width=2, frame_rate=sr, channels=1).export(outpath, format="mp3", bitrate=f"{kbps}k")
+        return
+    with tempfile.TemporaryFile() as err:
+        with perf.span("encode_mp3"):
+            p = subprocess.Popen(mp3_encoder_cmd(backend, sr, outpath, kbps), stdin=subprocess.PIPE,
+                                 stdout=subprocess.DEVNULL, stderr=err)
+            try:
+                for block in chunks: p.stdin.write(block)
+                p.stdin.close()
+            except BrokenPipeError:
+                pass  # the encoder quit early; its exit code says why
+            except BaseException:
+                # cancelled (worker.Cancelled) or the producer failed: don't leave the encoder or a partial file behind
+                p.kill(); p.wait(); _remove(outpath)
+                raise
+            rc = p.wait()
+        if rc != 0:
+            _remove(outpath)
+            err.seek(0)
+            raise RuntimeError(f"MP3 encoder ({backend}) failed with exit code {rc}:\n"
+                               + err.read().decode("utf-8", "replace").strip())
+
+def export_mp3(rows, freq, sr, vol, ramp, outpath, kbps=128):
+    encode_mp3(synth_iter(rows, freq, sr, vol, ramp), sr, outpath, kbps)
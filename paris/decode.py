@@ -0,0 +1,218 @@
+"""Decode .paris timelines and WAV files back to text and speed.
+
+    python -m paris.decode practice.wav lesson.paris --freq 700
+    python -m paris.decode out/*.wav --json > decoded.jsonl
+
+WAV files are read in blocks and cut into short frames; each frame's
+level at the tone frequency is one DFT bin (what a Goertzel filter
+computes), taken for a whole block at once as a matrix-vector product.
+Frames above an adaptive threshold are key-down. The resulting runs, or
+a .paris timeline, are classified by clustering mark and gap lengths
+(dit/dah, intra/letter/word) relative to each other, so no speed needs
+to be known in advance, and mapped back through MORSE.
+"""
+
+import sys, math, json, time, wave, argparse
+from array import array
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except Exception:
+    HAVE_NUMPY = False
+
+from .morse import MORSE
+from .parisfile import read_paris
+
+REVERSE = {code: ch for ch, code in MORSE.items()}
+UNKNOWN = "*"
+FRAME_MS = 2.0
+BLOCK_FRAMES = 4096    # detection frames per read (~8 s at 2 ms)
+LEVEL = 0.01       # key-down floor, fraction of full scale
+THRESHOLD = 0.3    # key-down above this fraction of the loudest frame so far
+
+def _two_means(xs):
+    """1-D 2-means on log lengths: (low centre, high centre), or None if xs looks like one cluster."""
+    lo, hi = min(xs), max(xs)
+    if hi < 1.5 * lo: return None
+    a, b = math.log(lo), math.log(hi)
+    logs = [math.log(x) for x in xs]
+    for _ in range(20):
+        cut = (a + b) / 2
+        low = [x for x in logs if x < cut]; high = [x for x in logs if x >= cut]
+        na, nb = sum(low) / len(low), sum(high) / len(high)
+        if (na, nb) == (a, b): break
+        a, b = na, nb
+    return math.exp(a), math.exp(b)
+
+def _runs(durs, vals):
+    # merge neighbours with the same key state, drop empty runs and the silence at either end
+    out = []
+    for d, v in zip(durs, vals):
+        if d <= 0: continue
+        v = 1 if v else 0
+        if out and out[-1][1] == v: out[-1][0] += d
+        else: out.append([d, v])
+    while out and not out[0][1]: out.pop(0)
+    while out and not out[-1][1]: out.pop()
+    return out
+
+def decode_runs(durs, vals):
+    """Text and speed from key run lengths (ms) and states; see decode_timeline()."""
+    runs = _runs(durs, vals)
+    marks = [d for d, v in runs if v]; gaps = [d for d, v in runs if not v]
+    if not marks:
+        return {"text": "", "char_wpm": 0.0, "farns_wpm": 0.0, "dit_ms": 0.0, "weight": 0.0, "elements": 0}
+    split = _two_means(marks)
+    if split:
+        dit, dah = split
+    else:
+        # all one length: dits if about as long as the shortest gaps, else dahs
+        m = sum(marks) / len(marks); dit = dah = m
+        if gaps and m > 2 * min(gaps): dit = m / 3
+        else: dah = 3 * m
+    mark_cut = math.sqrt(dit * dah)
+    # detected marks lose what their gaps gain (ramped edges under the threshold);
+    # a dit plus an intra-character gap is two dits either way, so split the difference
+    intra = [g for g in gaps if g < 2 * dit]
+    bias = (sum(intra) / len(intra) - dit) / 2 if intra and split else 0.0
+    dit += bias; dah += bias
+    spaces = [g - bias for g in gaps if g - bias >= 2 * dit]
+    split = _two_means(spaces) if spaces else None
+    if split:
+        letter, word = split; gap_cut = math.sqrt(letter * word)
+    else:
+        m = sum(spaces) / len(spaces) if spaces else 3 * dit
+        letter, word = (m, m * 7 / 3) if m < 5 * dit else (m * 3 / 7, m)
+        gap_cut = math.sqrt(letter * word)
+
+    text = []; code = []
+    for d, v in runs:
+        if v:
+            code.append("-" if d >= mark_cut else ".")
+        elif d - bias >= 2 * dit:
+            text.append(REVERSE.get("".join(code), UNKNOWN)); code = []
+            if d - bias >= gap_cut: text.append(" ")
+    text.append(REVERSE.get("".join(code), UNKNOWN))
+
+    char_wpm = 1200 / dit
+    # gap stretch over standard 3/7-dot spacing, weighted as in PARIS (4 letter gaps, 1 word gap)
+    stretch = (4 * letter + word) / (19 * dit)
+    return {"text": "".join(text), "char_wpm": char_wpm, "farns_wpm": char_wpm / stretch,
+            "dit_ms": dit, "weight": dah / dit, "elements": len(runs)}
+
+def decode_timeline(tl):
+    """Decode a MorseTimeline (or (duration_ms, value) rows).
+
+    Returns {"text", "char_wpm", "farns_wpm", "dit_ms", "weight",
+    "elements"}. farns_wpm follows morse.timing(): char_wpm divided by how
+    far the letter/word gaps are stretched beyond 3/7 dots, so it equals
+    char_wpm for standard spacing. Unknown codes decode as UNKNOWN.
+
+    Dits and dahs are told apart by their lengths relative to each other,
+    so a timeline whose marks all have one length is ambiguous: they are
+    taken as dahs only if longer than twice the shortest gap, and a lone
+    "T" decodes as "E".
+    """
+    if hasattr(tl, "durations"): return decode_runs(tl.durations, tl.values())
+    rows = list(tl)
+    return decode_runs([d for d, _ in rows], [v for _, v in rows])
+
+def decode_paris(path):
+    return decode_timeline(read_paris(path)[0])
+
+def _levels_np(x, w, n):
+    # tone amplitude (0..1 of full scale) per frame of n samples: |DFT bin| * 2 / n
+    f = x.reshape(-1, n)
+    return np.abs(f @ w) * (2 / (n * 32768))
+
+def _levels_py(x, freq, sr, n):
+    coeff = 2 * math.cos(2 * math.pi * freq / sr); out = []
+    for i in range(0, len(x) - n + 1, n):
+        s1 = s2 = 0.0
+        for v in x[i:i + n]: s1, s2 = v + coeff * s1 - s2, s1
+        out.append(math.sqrt(max(0.0, s1 * s1 + s2 * s2 - coeff * s1 * s2)) * 2 / (n * 32768))
+    return out
+
+def key_runs(path, freq=700, frame_ms=FRAME_MS, level=LEVEL, threshold=THRESHOLD):
+    """Yield (duration_ms, key_down) runs detected in a 16-bit PCM WAV file, reading it block by block."""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2: raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        sr, ch = w.getframerate(), w.getnchannels()
+        n = max(1, round(sr * frame_ms / 1000)); ms = 1000 * n / sr
+        if HAVE_NUMPY:
+            wv = np.exp(-2j * np.pi * freq * np.arange(n) / sr)
+            rest = np.zeros(0, dtype=np.float64)
+        else:
+            rest = []
+        peak = 0.0; state = 0; run = 0
+        while True:
+            data = w.readframes(BLOCK_FRAMES * n)
+            if not data: break
+            if HAVE_NUMPY:
+                x = np.concatenate((rest, np.frombuffer(data, dtype="<i2")[::ch]))
+                k = len(x) // n * n; rest = x[k:]
+                lv = _levels_np(x[:k], wv, n)
+                if not len(lv): continue
+                thr = np.maximum(level, threshold * np.maximum.accumulate(np.maximum(lv, peak)))
+                peak = max(peak, float(lv.max()))
+                on = (lv > thr).astype(np.int8)
+                edges = np.flatnonzero(np.diff(on)) + 1
+                starts = [0] + edges.tolist(); ends = edges.tolist() + [len(on)]
+                segs = [(int(on[a]), b - a) for a, b in zip(starts, ends)]
+            else:
+                a = array("h", data)
+                if sys.byteorder == "big": a.byteswap()
+                x = rest + list(a[::ch])
+                k = len(x) // n * n; rest = x[k:]
+                segs = []
+                for lv in _levels_py(x[:k], freq, sr, n):
+                    peak = max(peak, lv)
+                    v = 1 if lv > max(level, threshold * peak) else 0
+                    if segs and segs[-1][0] == v: segs[-1][1] += 1
+                    else: segs.append([v, 1])
+            for v, m in segs:
+                if v == state: run += m
+                else:
+                    if run: yield run * ms, state
+                    state, run = v, m
+        if run: yield run * ms, state
+
+def decode_wav(path, freq=700, frame_ms=FRAME_MS, level=LEVEL, threshold=THRESHOLD):
+    """decode_timeline() of the key runs detected in a WAV file (see key_runs())."""
+    durs = []; vals = []
+    for d, v in key_runs(path, freq, frame_ms, level, threshold):
+        durs.append(d); vals.append(v)
+    return decode_runs(durs, vals)
+
+def decode_file(path, freq=700, **kw):
+    """Decode by extension: .wav through key_runs() (kw as decode_wav()), anything else as a .paris file."""
+    if path.lower().endswith(".wav"): return decode_wav(path, freq, **kw)
+    return decode_paris(path)
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Decode .paris or WAV files back to text and speed.")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--freq", type=float, default=700, help="tone frequency of WAV files (Hz)")
+    p.add_argument("--frame-ms", type=float, default=FRAME_MS, help="tone detection frame length")
+    p.add_argument("--json", action="store_true", help="one JSON object per file")
+    a = p.parse_args(argv)
+    status = 0; audio = 0.0; t = time.perf_counter()
+    for path in a.files:
+        try:
+            r = decode_file(path, a.freq, frame_ms=a.frame_ms)
+        except (OSError, ValueError, EOFError, wave.Error) as e:
+            print(f"{path}: {e}", file=sys.stderr); status = 1; continue
+        if path.lower().endswith(".wav"):
+            with wave.open(path) as w: audio += w.getnframes() / w.getframerate()
+        if a.json:
+            print(json.dumps({"file": path, **r}))
+        else:
+            print(f"{path}: {r['char_wpm']:.1f} WPM char, {r['farns_wpm']:.1f} WPM Farnsworth\n  {r['text']}")
+    dt = time.perf_counter() - t
+    if audio and dt > 0:
+        print(f"{audio:.1f} s of audio in {dt:.2f} s ({audio / dt:.0f}x realtime)", file=sys.stderr)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import functools, random, secrets
+from array import array
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except Exception:
+    HAVE_NUMPY = False
+
+from .utils import dot_ms
+from .timeline import MorseTimeline
+from . import perf
+
+MORSE = {
+    "A": ".-", "B": "-...", "C": "-.-.", "D": "-..", "E": ".",
+    "F": "..-.", "G": "--.", "H": "....", "I": "..", "J": ".---",
+    "K": "-.-", "L": ".-..", "M": "--", "N": "-.", "O": "---",
+    "P": ".--.", "Q": "--.-", "R": ".-.", "S": "...", "T": "-",
+    "U": "..-", "V": "...-", "W": ".--", "X": "-..-", "Y": "-.--",
+    "Z": "--..",
+    "0": "-----", "1": ".----", "2": "..---", "3": "...--", "4": "....-",
+    "5": ".....", "6": "-....", "7": "--...", "8": "---..", "9": "----.",
+}
+
+# Element kinds, recorded per element so jitter can be drawn for the whole
+# timeline at once from the unrounded base durations.
+DOT, DASH, INTRA, LETTER, WORD = range(5)
+
+@functools.lru_cache(maxsize=32)
+def char_table(d_dot, d_dash, d_intra, d_ich):
+    """Precompiled elements per character: ch -> ((durations, values, kinds), same plus the letter gap)."""
+    tab = {}
+    for ch, code in MORSE.items():
+        durs = []; vals = []; kinds = []
+        for ei, e in enumerate(code):
+            durs.append(max(0, int(d_dot if e == '.' else d_dash))); vals.append(1); kinds.append(DOT if e == '.' else DASH)
+            if ei < len(code) - 1:
+                durs.append(max(0, int(d_intra))); vals.append(0); kinds.append(INTRA)
+        plain = (tuple(durs), bytes(vals), bytes(kinds))
+        tab[ch] = tab[ch.lower()] = (plain, (plain[0] + (max(0, int(d_ich)),), plain[1] + b"\0", plain[2] + bytes((LETTER,))))
+    return tab
+
+def timing(wpm, letsp_ms, wordsp_ms, farns_wpm=None, weight=3):
+    """Base durations (ms) indexed by kind. With farns_wpm, gaps stretch by wpm / farns_wpm (Farnsworth)."""
+    d_dot = dot_ms(wpm)
+    stretch = wpm / min(max(farns_wpm, 1e-9), wpm) if farns_wpm else 1.0
+    return (d_dot, weight * d_dot, d_dot, letsp_ms * stretch, wordsp_ms * stretch)
+
+def rng_name():
+    """Generator jittered() draws from; a seed reproduces a timeline only with the same one."""
+    return "numpy" if HAVE_NUMPY else "random"
+
+def resolve_seed(jitter, seed=None):
+    """seed, or a fresh random one when jitter is on and seed is None, so the caller can record what was drawn."""
+    if jitter > 0 and seed is None: return secrets.randbits(32)
+    return seed
+
+def jittered(kinds, base, jitter, seed):
+    """Durations for kinds with every element scaled by 1 + U(-jitter%, +jitter%), drawn in one batch from seed."""
+    p = jitter / 100
+    if HAVE_NUMPY:
+        rng = np.random.default_rng(seed)
+        d = np.asarray(base)[np.frombuffer(bytes(kinds), dtype=np.uint8)] * (1 + rng.uniform(-p, p, len(kinds)))
+        return array("I", np.maximum(d, 0).astype(np.uint32).tobytes())
+    rng = random.Random(seed)
+    return array("I", [max(0, int(base[k] * (1 + rng.uniform(-p, p)))) for k in kinds])
+
+def _assemble(words, tab, iw, seen, base=None, jitter=0, seed=None, pre=0, post=0):
+    with perf.span("build_rows"):
+        durs, vals, kinds = _assemble_words(words, tab, iw, seen, jitter > 0)
+        if jitter > 0: durs = jittered(kinds, base, jitter, seed)
+        if pre: durs.insert(0, max(0, int(pre))); vals.insert(0, 0)
+        if post: durs.append(max(0, int(post))); vals.append(0)
+        tl = MorseTimeline(durs, vals)
+    perf.count("rows", len(tl))
+    return tl
+
+def _assemble_words(words, tab, iw, seen, want_kinds):
+    durs = array("I"); vals = bytearray(); kinds = bytearray() if want_kinds else None
+    last = len(words) - 1
+    for wi, w in enumerate(words):
+        wr = seen.get(w)
+        if wr is None:
+            wd = array("I"); wv = bytearray(); wk = bytearray()
+            for ci, ch in enumerate(w):
+                r = tab.get(ch) or tab.get(ch.upper())
+                if r:
+                    d, v, k = r[ci < len(w) - 1]
+                    wd.extend(d); wv += v; wk += k
+            wr = seen[w] = (wd, wv, wk)
+        durs.extend(wr[0]); vals += wr[1]
+        if want_kinds: kinds += wr[2]
+        if wi < last:
+            durs.append(iw); vals.append(0)
+            if want_kinds: kinds.append(WORD)
+    return durs, vals, kinds
+
+def build_rows(text, wpm, letsp_ms, wordsp_ms, farns_wpm=None, weight=3, jitter=0, seed=None, pre=0, post=0):
+    """Encode text as a MorseTimeline.
+
+    letsp_ms/wordsp_ms are the gaps at character speed; farns_wpm stretches
+    them Farnsworth-style, weight is the dash length in dots, and jitter
+    (percent) randomizes every element and gap from seed. pre/post add
+    leading/trailing silence (ms). A None seed with jitter gives a timeline
+    that can't be reproduced; use resolve_seed() first to keep the seed.
+    """
+    base = timing(wpm, letsp_ms, wordsp_ms, farns_wpm, weight)
+    tab = char_table(*base[:4])
+    return _assemble(text.split(), tab, max(0, int(base[WORD])), {}, base, jitter, seed, pre, post)
+
+class Encoder:
+    """build_rows() that keeps encoded words between calls.
+
+    While the timing parameters stay the same, only words not seen in an
+    earlier call are encoded, so re-encoding after an edit costs one
+    array extend per unchanged word.
+    """
+    def __init__(self, max_words=20000):
+        self.max_words = max_words
+        self.params = None; self.words = {}
+
+    def build(self, text, wpm, letsp_ms, wordsp_ms, farns_wpm=None, weight=3, jitter=0, seed=None, pre=0, post=0):
+        base = timing(wpm, letsp_ms, wordsp_ms, farns_wpm, weight)
+        if base[:4] != self.params or len(self.words) > self.max_words:
+            self.params = base[:4]; self.words = {}
+        tab = char_table(*base[:4])
+        return _assemble(text.split(), tab, max(0, int(base[WORD])), self.words, base, jitter, seed, pre, post)
@@ -0,0 +1,153 @@
+import sys, json, mmap, struct, itertools
+from array import array
+
+from .timeline import MorseTimeline
+from .morse import rng_name
+
+COLUMNS = "duration_ms,value"
+
+# Binary .paris: fixed header, UTF-8 JSON metadata (the '# ...' header
+# lines), zero padding to a 4-byte boundary, n little-endian uint32
+# durations, then the key-state bitset (bit i = element i, LSB first).
+MAGIC = b"PARISBIN"
+VERSION = 1
+BIN_HEAD = struct.Struct("<8sHHQI")  # magic, version, flags, element count, metadata length
+
+def header(text, wpm, letsp_ms, wordsp_ms, farns_wpm=None, weight=3, jitter=0, seed=None, pre=0, post=0):
+    """'# ...' lines recording how a timeline was built; the text is collapsed onto one line as build_rows() splits it."""
+    lines = [f"# Word: {' '.join(text.split())}", f"# Char speed: {wpm} WPM", f"# Letter space: {letsp_ms} ms", f"# Word space: {wordsp_ms} ms"]
+    if farns_wpm: lines.append(f"# Farnsworth: {farns_wpm} WPM")
+    if weight != 3: lines.append(f"# Weight: {weight}")
+    if jitter: lines.append(f"# Jitter: {jitter} % seed {seed} rng {rng_name()}")
+    if pre: lines.append(f"# Pre-delay: {pre} ms")
+    if post: lines.append(f"# Post-delay: {post} ms")
+    return lines
+
+def header_params(lines):
+    """build_rows() keyword arguments recorded by header(), to regenerate a timeline exactly."""
+    p = {}
+    for line in lines:
+        key, _, val = line.lstrip("# ").partition(": ")
+        f = val.split()
+        try:
+            if key == "Char speed": p["wpm"] = float(f[0])
+            elif key == "Letter space": p["letsp_ms"] = float(f[0])
+            elif key == "Word space": p["wordsp_ms"] = float(f[0])
+            elif key == "Farnsworth": p["farns_wpm"] = float(f[0])
+            elif key == "Weight": p["weight"] = float(f[0])
+            elif key == "Pre-delay": p["pre"] = float(f[0])
+            elif key == "Post-delay": p["post"] = float(f[0])
+            elif key == "Jitter":
+                p["jitter"] = float(f[0]); p["seed"] = None if f[3] == "None" else int(f[3])
+        except (IndexError, ValueError):
+            pass
+    return p
+
+def iter_format_paris(tl, header=(), chunk_rows=65536):
+    """Text .paris contents in pieces: '# ...' header lines, the column line, then one 'duration_ms,value' line per element."""
+    yield "\n".join(list(header) + [COLUMNS])
+    rows = iter(tl)
+    while True:
+        block = "".join(f"\n{d},{v}" for d, v in itertools.islice(rows, chunk_rows))
+        if not block: return
+        yield block
+
+def format_paris(tl, header=()):
+    return "".join(iter_format_paris(tl, header))
+
+def write_paris(path, tl, header=(), binary=False):
+    if binary: return write_paris_bin(path, tl, header)
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(iter_format_paris(tl, header))
+
+def write_paris_bin(path, tl, header=()):
+    tl = MorseTimeline.from_rows(tl)
+    meta = json.dumps({"header": list(header)}).encode("utf-8")
+    durs = tl.durations
+    if sys.byteorder == "big": durs = array("I", durs); durs.byteswap()
+    with open(path, "wb") as f:
+        f.write(BIN_HEAD.pack(MAGIC, VERSION, 0, len(tl), len(meta)) + meta)
+        f.write(bytes(-(BIN_HEAD.size + len(meta)) % 4))
+        f.write(durs.tobytes()); f.write(tl.bits)
+
+def is_binary(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def read_paris(path, errors=None):
+    """Returns (MorseTimeline, header lines) from a text or binary .paris file (detected by the magic).
+
+    For text files, malformed lines are collected in errors or raise ParseError (see iter_paris_text).
+    """
+    if is_binary(path): return read_paris_bin(path)
+    return read_paris_text(path, errors)
+
+def read_paris_bin(path):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, ver, flags, n, mlen = BIN_HEAD.unpack_from(mm)
+        if magic != MAGIC or ver > VERSION:
+            raise ValueError(f"unsupported .paris binary (version {ver})")
+        meta = json.loads(bytes(mm[BIN_HEAD.size:BIN_HEAD.size + mlen]) or b"{}")
+        off = BIN_HEAD.size + mlen; off += -off % 4
+        nb = (n + 7) // 8
+        if len(mm) < off + 4 * n + nb:
+            raise ValueError("truncated .paris file")
+        with memoryview(mm) as mv:
+            durs = array("I"); durs.frombytes(mv[off:off + 4 * n])
+            bits = bytearray(mv[off + 4 * n:off + 4 * n + nb])
+    if sys.byteorder == "big": durs.byteswap()
+    return MorseTimeline.from_bits(durs, bits), meta.get("header", [])
+
+def convert_paris(src, dst, binary=None):
+    """Rewrite src as dst in the other format (or the one given by binary)."""
+    tl, head = read_paris(src)
+    write_paris(dst, tl, head, binary=not is_binary(src) if binary is None else binary)
+
+class ParseError(ValueError):
+    def __init__(self, lineno, line, msg):
+        super().__init__(f"line {lineno}: {msg}: {line!r}")
+        self.lineno = lineno; self.line = line
+
+def iter_paris_text(f, header=None, errors=None, chunk_rows=65536):
+    """Stream a text .paris file (path or open text file) as (array('I') durations, 0/1 bytearray) chunks.
+
+    '# ...' lines are appended to header. Malformed lines are appended to
+    errors as ParseError, or raised when errors is None.
+    """
+    if isinstance(f, str):
+        with open(f, "r", encoding="utf-8") as fh:
+            yield from iter_paris_text(fh, header, errors, chunk_rows)
+        return
+    durs = array("I"); vals = bytearray()
+    for lineno, line in enumerate(f, 1):
+        line = line.strip()
+        if not line: continue
+        if line.startswith('#'):
+            if header is not None: header.append(line)
+            continue
+        if line.startswith('duration'): continue
+        dur, sep, val = line.partition(',')
+        try:
+            if not sep: raise ValueError("expected duration_ms,value")
+            try: d = int(dur)
+            except ValueError: d = int(float(dur))
+            try: v = int(val)
+            except ValueError: v = int(float(val))
+            if d < 0: raise ValueError("negative duration")
+            durs.append(d); vals.append(1 if v else 0)
+        except (ValueError, OverflowError) as e:
+            err = ParseError(lineno, line, e.args[0] if e.args else "bad value")
+            if errors is None: raise err
+            errors.append(err)
+            continue
+        if len(vals) >= chunk_rows:
+            yield durs, vals
+            durs = array("I"); vals = bytearray()
+    if vals: yield durs, vals
+
+def read_paris_text(path, errors=None):
+    """Malformed lines go to errors (a list), or raise ParseError when errors is None."""
+    durs = array("I"); vals = bytearray(); header = []
+    for d, v in iter_paris_text(path, header, errors):
+        durs.extend(d); vals += v
+    return MorseTimeline(durs, vals), header
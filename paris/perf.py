@@ -0,0 +1,95 @@
+"""Named timing spans and counters for the render pipeline.
+
+Off by default; span() then returns a shared no-op context manager, so
+instrumented code pays one function call per stage. Turn it on with
+enable() or PARIS_PERF=1. PARIS_PROFILE=path.prof additionally runs one
+op() under cProfile and dumps pstats output there (readable by snakeviz,
+flameprof, gprof2dot): the first one named PARIS_PROFILE_OP (e.g.
+export_wav), or the first of any name if that is unset. cProfile only
+sees the thread it runs in, so ops wrap the code on the thread that
+does the work; op_iter() does that for a generator consumed elsewhere.
+"""
+
+import os, time, threading
+from contextlib import contextmanager, nullcontext
+
+ENABLED = bool(os.environ.get("PARIS_PERF"))
+PROFILE_PATH = os.environ.get("PARIS_PROFILE")
+PROFILE_OP = os.environ.get("PARIS_PROFILE_OP")
+
+_lock = threading.Lock()
+spans = {}     # name -> [calls, total seconds, last seconds]
+counters = {}  # name -> total
+_NULL = nullcontext()
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+def reset():
+    with _lock: spans.clear(); counters.clear()
+
+def span(name):
+    return _span(name) if ENABLED else _NULL
+
+@contextmanager
+def _span(name):
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - t)
+
+def add(name, dt):
+    """Record a span measured by hand, e.g. the work a generator did between yields."""
+    if ENABLED:
+        with _lock:
+            s = spans.setdefault(name, [0, 0.0, 0.0])
+            s[0] += 1; s[1] += dt; s[2] = dt
+
+def count(name, n=1):
+    if ENABLED:
+        with _lock: counters[name] = counters.get(name, 0) + n
+
+def last_ms(name):
+    s = spans.get(name)
+    return s[2] * 1000 if s else 0.0
+
+@contextmanager
+def op(name):
+    """A top-level user operation: a span, profiled once if PARIS_PROFILE is set (see PARIS_PROFILE_OP)."""
+    global PROFILE_PATH
+    with _lock:
+        path = PROFILE_PATH if PROFILE_OP in (None, name) else None
+        if path: PROFILE_PATH = None
+    if not path:
+        with span(name): yield
+        return
+    import cProfile
+    prof = cProfile.Profile()
+    try:
+        with span(name):
+            prof.enable()
+            try: yield
+            finally: prof.disable()
+    finally:
+        prof.dump_stats(path)
+
+def op_iter(name, blocks):
+    """Yield from blocks inside op(name), so the op is timed and profiled on the thread that consumes them."""
+    with op(name): yield from blocks
+
+def summary(stages, audio_s=None, work=("build_rows", "synth", "write_wav")):
+    """'build_rows 1.2 ms | synth 8.0 ms | 120.5x realtime' from the last run of each stage.
+
+    The realtime factor is audio_s over the time of the work stages listed.
+    """
+    parts = [f"{n} {last_ms(n):.1f} ms" for n in stages if n in spans]
+    busy = sum(last_ms(n) for n in stages if n in work) / 1000
+    if audio_s and busy > 0: parts.append(f"{audio_s / busy:.1f}x realtime")
+    return " | ".join(parts)
+
+def report():
+    lines = [f"{n:16s} {c:6d} calls {t * 1000:10.1f} ms total {l * 1000:8.1f} ms last"
+             for n, (c, t, l) in sorted(spans.items())]
+    return "\n".join(lines + [f"{n:16s} {v}" for n, v in sorted(counters.items())])
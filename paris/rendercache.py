@@ -0,0 +1,209 @@
+"""Content-addressed cache of rendered PCM, shared by Play and the exports.
+
+Renders are keyed by a hash of everything that determines the audio
+(text and timing parameters incl. the jitter seed, or the timeline
+itself, plus freq/sr/vol/ramp). Recent renders stay in memory under a
+byte budget; every completed render is also written to a cache
+directory, trimmed least-recently-used first to its own budget.
+"""
+
+import os, hashlib, tempfile, threading
+from collections import OrderedDict
+
+from .audio import synth_iter
+
+MEM_LIMIT = int(float(os.environ.get("PARIS_CACHE_MB", 64)) * 2**20)
+DISK_LIMIT = int(float(os.environ.get("PARIS_CACHE_DISK_MB", 512)) * 2**20)
+
+# Hashed into every key; bump it whenever synthesis output changes for the
+# same parameters, so stale renders in the cache directory are never served.
+CACHE_VERSION = 1
+
+def default_dir():
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "paris-studio")
+
+def cache_key(*parts):
+    """sha256 over CACHE_VERSION and the parts; bytes-like parts (e.g. tl.durations, tl.bits) are hashed as raw bytes."""
+    h = hashlib.sha256()
+    for p in (CACHE_VERSION,) + parts:
+        if isinstance(p, (bytes, bytearray, memoryview)) or hasattr(p, "tobytes"):
+            h.update(b"b%d:" % len(memoryview(p).cast("B"))); h.update(p)
+        else:
+            r = repr(p).encode("utf-8"); h.update(b"r%d:" % len(r)); h.update(r)
+    return h.hexdigest()
+
+def timeline_key(tl, *tone):
+    return cache_key("timeline", tl.durations, tl.bits, *tone)
+
+class RenderCache:
+    def __init__(self, mem_limit=MEM_LIMIT, disk_limit=DISK_LIMIT, path=None):
+        self.path = path or default_dir()
+        self.mem = OrderedDict(); self.mem_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = 0
+        self.set_limits(mem_limit, disk_limit)
+
+    def set_limits(self, mem_limit=None, disk_limit=None):
+        """Byte budgets; 0 disables that tier (a disabled disk tier neither reads nor trims the directory)."""
+        if mem_limit is not None: self.mem_limit = mem_limit
+        if disk_limit is not None: self.disk_limit = disk_limit
+        with self.lock: self._trim_mem()
+        self._trim_disk()
+
+    def file(self, key):
+        return os.path.join(self.path, key + ".pcm")
+
+    def get(self, key):
+        """PCM bytes if key is cached in memory or on disk (a disk hit is promoted to memory), else None."""
+        with self.lock:
+            pcm = self.mem.get(key)
+            if pcm is not None:
+                self.mem.move_to_end(key); self.hits += 1
+                return pcm
+        try:
+            if self.disk_limit <= 0: raise FileNotFoundError(key)
+            with open(self.file(key), "rb") as f: pcm = f.read()
+            os.utime(self.file(key))
+        except OSError:
+            with self.lock: self.misses += 1
+            return None
+        with self.lock:
+            self.disk_hits += 1; self._remember(key, pcm)
+        return pcm
+
+    def size(self, key):
+        """Byte length of a cached render, or None if key is not cached."""
+        with self.lock: pcm = self.mem.get(key)
+        if pcm is not None: return len(pcm)
+        if self.disk_limit <= 0: return None
+        try: return os.path.getsize(self.file(key))
+        except OSError: return None
+
+    def stream(self, key, render, chunk_bytes=16384):
+        """Yield PCM blocks for key: from memory or disk on a hit, else from render() while caching it.
+
+        A render is only cached once the consumer has taken all of it, so
+        a stopped preview never leaves a truncated entry behind.
+        """
+        with self.lock:
+            pcm = self.mem.get(key)
+            if pcm is not None: self.mem.move_to_end(key); self.hits += 1
+        if pcm is not None:
+            view = memoryview(pcm)
+            for i in range(0, len(view), chunk_bytes): yield bytes(view[i:i + chunk_bytes])
+            return
+        try:
+            f = open(self.file(key), "rb") if self.disk_limit > 0 else None
+        except OSError:
+            f = None
+        if f:
+            with f:
+                try:
+                    os.utime(self.file(key))
+                except OSError:
+                    pass  # trimmed since the open; the open handle still reads it
+                with self.lock: self.disk_hits += 1
+                while True:
+                    block = f.read(chunk_bytes)
+                    if not block: return
+                    yield block
+        with self.lock: self.misses += 1
+        yield from self._tee(key, render())
+
+    def synth(self, key, rows, tone, chunk_frames=8192):
+        """PCM blocks of rows rendered with tone (freq, sr, vol, ramp), through the cache under key.
+
+        rows may be a zero-argument callable that builds the timeline; it is
+        only called on a miss, so a caller that found key cached needn't
+        keep the timeline, and an entry evicted since is rebuilt.
+        """
+        def render():
+            return synth_iter(rows() if callable(rows) else rows, *tone, chunk_frames=chunk_frames)
+        return self.stream(key, render, 2 * chunk_frames)
+
+    def _tee(self, key, chunks):
+        keep = []; size = 0; tmp = None
+        if self.disk_limit > 0:
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".part"); out = os.fdopen(fd, "wb")
+            except OSError:
+                tmp = None
+        try:
+            for block in chunks:
+                if tmp: out.write(block)
+                size += len(block)
+                if keep is not None:
+                    keep.append(block)
+                    if size > self.mem_limit // 2: keep = None  # too big for memory, disk only
+                yield block
+            if tmp:
+                out.close(); os.replace(tmp, self.file(key)); tmp = None
+                self._trim_disk()
+            if keep is not None and size:
+                with self.lock: self._remember(key, b"".join(keep))
+        finally:
+            if tmp:
+                out.close()
+                try: os.remove(tmp)
+                except OSError: pass
+
+    def put(self, key, pcm):
+        with self.lock: self._remember(key, bytes(pcm))
+        if self.disk_limit > 0:
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".part")
+                with os.fdopen(fd, "wb") as f: f.write(pcm)
+                os.replace(tmp, self.file(key))
+            except OSError:
+                return
+            self._trim_disk()
+
+    def _remember(self, key, pcm):
+        # caller holds self.lock
+        if len(pcm) > self.mem_limit // 2: return
+        old = self.mem.pop(key, None)
+        if old is not None: self.mem_bytes -= len(old)
+        self.mem[key] = pcm; self.mem_bytes += len(pcm)
+        self._trim_mem()
+
+    def _trim_mem(self):
+        while self.mem_bytes > self.mem_limit and self.mem:
+            _, pcm = self.mem.popitem(last=False); self.mem_bytes -= len(pcm)
+
+    def _entries(self):
+        if self.disk_limit <= 0: return []  # disk tier off: leave the directory alone
+        try: names = os.listdir(self.path)
+        except OSError: return []
+        out = []
+        for n in names:
+            if not n.endswith(".pcm"): continue
+            try: st = os.stat(os.path.join(self.path, n))
+            except OSError: continue
+            out.append((st.st_mtime, st.st_size, n))
+        return sorted(out)
+
+    def disk_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _trim_disk(self):
+        entries = self._entries(); total = sum(size for _, size, _ in entries)
+        for _, size, n in entries:
+            if total <= self.disk_limit: break
+            try: os.remove(os.path.join(self.path, n)); total -= size
+            except OSError: pass
+
+    def clear(self):
+        with self.lock: self.mem.clear(); self.mem_bytes = 0
+        for _, _, n in self._entries():
+            try: os.remove(os.path.join(self.path, n))
+            except OSError: pass
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "mem_bytes": self.mem_bytes, "mem_limit": self.mem_limit,
+                "disk_bytes": self.disk_bytes(), "disk_limit": self.disk_limit}
@@ -0,0 +1,129 @@
+from array import array
+from bisect import bisect_right
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except Exception:
+    HAVE_NUMPY = False
+
+# byte -> its 8 bits as 0/1 bytes (LSB first), and the reverse
+_UNPACK = [bytes((b >> i) & 1 for i in range(8)) for b in range(256)]
+_PACK = {v: k for k, v in enumerate(_UNPACK)}
+
+def pack_bits(vals):
+    """0/1 bytes -> packed bitset, bit i of the result is vals[i]."""
+    vals = bytes(vals)
+    if HAVE_NUMPY:
+        return bytearray(np.packbits(np.frombuffer(vals, dtype=np.uint8) != 0, bitorder="little").tobytes())
+    pad = vals + bytes(-len(vals) % 8)
+    return bytearray(_PACK[pad[i:i + 8]] for i in range(0, len(pad), 8))
+
+def unpack_bits(bits, n):
+    if HAVE_NUMPY:
+        return np.unpackbits(np.frombuffer(bytes(bits), dtype=np.uint8), count=n, bitorder="little").tobytes()
+    return b"".join(_UNPACK[b] for b in bits)[:n]
+
+class MorseTimeline:
+    """Key timeline: durations (ms) in an array('I'), key-down state in a packed bitset.
+
+    Immutable once built, so the total duration and the cumulative offset
+    index are computed on first use and cached. Iterating yields
+    (duration_ms, value) tuples like the old row lists. For zero-copy
+    access use the buffers themselves: tl.durations (uint32, native byte
+    order) and tl.bits (bit i = element i, LSB first).
+    """
+    __slots__ = ("durations", "bits", "_n", "_total", "_offsets", "_on")
+
+    def __init__(self, durations=(), values=b""):
+        self.durations = durations if isinstance(durations, array) and durations.typecode == "I" else array("I", durations)
+        self._n = len(self.durations)
+        if len(values) != self._n:
+            raise ValueError("durations and values differ in length")
+        self.bits = pack_bits(values)
+        self._total = None; self._offsets = None; self._on = None
+
+    @classmethod
+    def from_bits(cls, durations, bits):
+        tl = cls.__new__(cls)
+        tl.durations = durations if isinstance(durations, array) else array("I", durations)
+        tl._n = len(tl.durations); tl.bits = bytearray(bits)
+        tl._total = None; tl._offsets = None; tl._on = None
+        return tl
+
+    @classmethod
+    def from_rows(cls, rows):
+        if isinstance(rows, cls): return rows
+        rows = list(rows)
+        return cls(array("I", [max(0, int(d)) for d, _ in rows]), bytes(1 if v else 0 for _, v in rows))
+
+    def values(self):
+        """Key state per element as 0/1 bytes."""
+        return unpack_bits(self.bits, self._n)
+
+    @property
+    def total(self):
+        if self._total is None: self._total = sum(self.durations)
+        return self._total
+
+    @property
+    def offsets(self):
+        """array('Q') of start times, len(self) + 1 entries (the last is the total)."""
+        if self._offsets is None:
+            off = array("Q", [0]); t = 0
+            if HAVE_NUMPY and self._n:
+                off.frombytes(np.cumsum(np.frombuffer(self.durations, dtype=np.uint32), dtype=np.uint64).tobytes())
+            else:
+                for d in self.durations: t += d; off.append(t)
+            self._offsets = off
+        return self._offsets
+
+    @property
+    def on_offsets(self):
+        """array('Q') of key-down time elapsed before each element, len(self) + 1 entries."""
+        if self._on is None:
+            on = array("Q", [0]); t = 0
+            if HAVE_NUMPY and self._n:
+                d = np.frombuffer(self.durations, dtype=np.uint32).astype(np.uint64)
+                d *= np.frombuffer(self.values(), dtype=np.uint8)
+                on.frombytes(np.cumsum(d).tobytes())
+            else:
+                for d, v in self:
+                    if v: t += d
+                    on.append(t)
+            self._on = on
+        return self._on
+
+    def on_time(self, t):
+        """Key-down time in [0, t) ms, O(log n)."""
+        if t <= 0 or not self._n: return 0
+        if t >= self.total: return self.on_offsets[-1]
+        i = bisect_right(self.offsets, t) - 1
+        return self.on_offsets[i] + (t - self.offsets[i] if self[i][1] else 0)
+
+    def index_at(self, t):
+        """Index of the element sounding at time t ms (clamped to the ends), O(log n)."""
+        if not self._n: raise IndexError("empty timeline")
+        return min(max(bisect_right(self.offsets, t) - 1, 0), self._n - 1)
+
+    def __len__(self): return self._n
+    def __bool__(self): return self._n > 0
+    def __iter__(self): return zip(self.durations, self.values())
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return MorseTimeline(self.durations[i], self.values()[i])
+        if i < 0: i += self._n
+        if not 0 <= i < self._n: raise IndexError("timeline index out of range")
+        return self.durations[i], (self.bits[i >> 3] >> (i & 7)) & 1
+
+    def __eq__(self, other):
+        if isinstance(other, MorseTimeline):
+            return self.durations == other.durations and self.values() == other.values()
+        try: return list(self) == [tuple(r) for r in other]
+        except TypeError: return NotImplemented
+
+    def __repr__(self):
+        return f"MorseTimeline({self._n} elements, {self.total} ms)"
+
+    def tolist(self): return list(self)
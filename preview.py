@@ -0,0 +1,69 @@
+import tkinter as tk
+from tkinter import ttk, font
+
+from paris.parisfile import COLUMNS
+
+class PreviewPane(ttk.Frame):
+    """Read-only .paris text view that formats only the lines on screen.
+
+    The rows stay in their MorseTimeline; scrolling re-renders the visible
+    window, so a million-row timeline never becomes one big string.
+    """
+    MAX_LINE = 500
+
+    def __init__(self, master, height=16):
+        super().__init__(master)
+        self.text = tk.Text(self, height=height, wrap="none", state="disabled")
+        self.bar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.text.grid(row=0, column=0, sticky="nsew"); self.bar.grid(row=0, column=1, sticky="ns")
+        self.rowconfigure(0, weight=1); self.columnconfigure(0, weight=1)
+        self.head = []; self.rows = (); self.top = 0; self.visible = height
+        self.linespace = max(1, font.Font(font=self.text["font"]).metrics("linespace"))
+        self.text.bind("<Configure>", self.resize)
+        self.text.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.text.bind("<Button-5>", lambda e: self.scroll(3))
+        for key, n in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "page-"), ("<Next>", "page+")):
+            self.text.bind(key, lambda e, n=n: self.scroll(n))
+
+    def set(self, rows, head=(), keep_pos=False):
+        self.rows = rows; self.head = list(head) + [COLUMNS]
+        if not keep_pos: self.top = 0
+        self.render()
+
+    def total(self):
+        return len(self.head) + len(self.rows)
+
+    def line(self, i):
+        if i < len(self.head):
+            s = self.head[i]
+            return s if len(s) <= self.MAX_LINE else s[:self.MAX_LINE] + "..."
+        d, v = self.rows[i - len(self.head)]
+        return f"{d},{v}"
+
+    def render(self):
+        n = self.total()
+        self.top = max(0, min(self.top, n - self.visible))
+        end = min(n, self.top + self.visible)
+        self.text.config(state="normal"); self.text.delete("1.0", "end")
+        self.text.insert("1.0", "\n".join(self.line(i) for i in range(self.top, end)))
+        self.text.config(state="disabled")
+        self.bar.set(self.top / n if n else 0, end / n if n else 1)
+
+    def scroll(self, n):
+        if n == "page-": n = -self.visible
+        elif n == "page+": n = self.visible
+        self.top += n; self.render()
+        return "break"
+
+    def yview(self, *a):
+        if a[0] == "moveto":
+            self.top = int(float(a[1]) * self.total())
+        elif a[0] == "scroll":
+            self.top += int(a[1]) * (self.visible if a[2] == "pages" else 1)
+        self.render()
+
+    def resize(self, e):
+        visible = max(1, e.height // self.linespace)
+        if visible != self.visible:
+            self.visible = visible; self.render()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Local HTTP render service: text + timing/tone parameters -> WAV or .paris.
+
+    python server.py --port 8765
+    curl -o paris.wav 'http://127.0.0.1:8765/render?text=PARIS&wpm=20&freq=600'
+    curl 'http://127.0.0.1:8765/render?text=CQ+DE+KF5JEX&format=paris'
+    curl -d '{"text": "PARIS", "jitter": 5, "seed": 1}' http://127.0.0.1:8765/render
+
+Parameters (query string, form or JSON body) follow batch.py: text, wpm,
+letsp, wordsp (ms), farns, weight, jitter, seed, freq, sr, vol, ramp and
+format=wav|paris. Responses use chunked transfer, so audio streams while
+it renders. Jitter without a seed gets a random one, returned in X-Seed.
+Identical concurrent requests share one render, finished results are
+kept in memory, and GET /stats reports both; renders larger than the
+cache can hold are neither shared nor kept, and ones longer than
+MAX_SECONDS are refused with 400.
+Never imports tkinter or pydub.
+"""
+
+import sys, math, json, argparse, itertools, threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from paris.morse import build_rows, resolve_seed
+from paris.audio import synth_iter, frames, wav_header
+from paris.parisfile import header, iter_format_paris
+from paris.rendercache import RenderCache, cache_key
+from paris import perf
+
+MAX_TEXT = 100000
+MAX_SECONDS = 3600  # longest render served, checked before any audio is made
+CACHE_MB = 256
+
+# name -> (type, default); a None default stays None (no Farnsworth stretch, a fresh seed for jitter)
+PARAMS = {"text": (str, "PARIS"), "wpm": (float, 15), "letsp": (float, 300), "wordsp": (float, 700),
+          "farns": (float, None), "weight": (float, 3), "jitter": (float, 0), "seed": (int, None),
+          "freq": (float, 700), "sr": (int, 44100), "vol": (float, 0.6), "ramp": (float, 5), "format": (str, "wav")}
+
+def parse_params(raw):
+    """Validated parameters from a {name: value} mapping; raises ValueError with a message for the client."""
+    p = {}
+    for name, (kind, default) in PARAMS.items():
+        v = raw.get(name)
+        if isinstance(v, list): v = v[-1]
+        if v is None or v == "":
+            v = default
+            if v is None: p[name] = None; continue
+        try: p[name] = kind(v)
+        except (TypeError, ValueError, OverflowError): raise ValueError(f"bad {name}: {v!r}")
+        if kind is float and not math.isfinite(p[name]): raise ValueError(f"bad {name}: {v!r}")
+    if p["format"] not in ("wav", "paris"): raise ValueError("format must be wav or paris")
+    if len(p["text"]) > MAX_TEXT: raise ValueError(f"text longer than {MAX_TEXT} characters")
+    if not 1 <= p["wpm"] <= 100: raise ValueError("wpm must be 1-100")
+    if p["farns"] is not None and not 1 <= p["farns"] <= 100: raise ValueError("farns must be 1-100")
+    if p["seed"] is not None and p["seed"] < 0: raise ValueError("seed must not be negative")
+    if not 4000 <= p["sr"] <= 192000: raise ValueError("sr must be 4000-192000")
+    if not 0 <= p["vol"] <= 1: raise ValueError("vol must be 0-1")
+    if not 0 < p["freq"] < p["sr"] / 2: raise ValueError("freq must be between 0 and sr/2")
+    if min(p["letsp"], p["wordsp"], p["ramp"], p["jitter"]) < 0: raise ValueError("negative spacing, ramp or jitter")
+    if max(p["letsp"], p["wordsp"]) > 60000 or p["ramp"] > 1000 or p["jitter"] > 100:
+        raise ValueError("spacing must be at most 60000 ms, ramp 1000 ms and jitter 100 %")
+    # the seed is part of the cache key and the .paris header, so draw it now; without jitter it has no effect
+    p["seed"] = resolve_seed(p["jitter"], p["seed"]) if p["jitter"] > 0 else None
+    return p
+
+class TooLong(ValueError):
+    """A request that parsed but would render more than MAX_SECONDS; answered with 400."""
+
+class Render:
+    """One render that any number of responses stream from, in-flight or finished.
+
+    All blocks are kept, so a late request can replay the render from the
+    start, until they pass keep bytes (more than the cache would hold).
+    From then on the render is no longer shared: only the readers already
+    attached get the rest, blocks they have all sent are dropped, and the
+    producer waits while the slowest of them is keep bytes behind.
+    """
+    def __init__(self, keep):
+        self.keep = keep; self.shared = True
+        self.blocks = []; self.first = 0; self.held = 0  # blocks[0] is block number first; held = their bytes
+        self.readers = {}  # reader -> number of the next block it sends
+        self.done = False; self.error = None
+        self.cond = threading.Condition()
+
+    def add(self, block):
+        """Append a block; False once nobody is left to send it to (stop rendering)."""
+        with self.cond:
+            self.blocks.append(block); self.held += len(block)
+            if self.held > self.keep: self.shared = False
+            if not self.shared:
+                self._drop()
+                while self.readers and self.held > self.keep: self.cond.wait()
+            self.cond.notify_all()
+            return self.shared or bool(self.readers)
+
+    def _drop(self):
+        # caller holds self.cond
+        n = min(self.readers.values(), default=self.first + len(self.blocks)) - self.first
+        if n > 0:
+            self.held -= sum(map(len, self.blocks[:n])); del self.blocks[:n]; self.first += n
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond: self.done = True; self.error = error; self.cond.notify_all()
+
+    def join(self):
+        """An iterator over the whole render, or None if it has grown past keep and can't be replayed."""
+        with self.cond:
+            if not self.shared: return None
+            reader = object(); self.readers[reader] = 0
+        return self._read(reader)
+
+    def _read(self, reader):
+        try:
+            while True:
+                with self.cond:
+                    i = self.readers[reader]
+                    while i == self.first + len(self.blocks) and not self.done: self.cond.wait()
+                    new = self.blocks[i - self.first:]; i = self.readers[reader] = i + len(new)
+                    done = self.done and i == self.first + len(self.blocks); error = self.error
+                    if not self.shared: self._drop()
+                yield from new
+                if done:
+                    if error: raise error
+                    return
+        finally:
+            with self.cond:
+                del self.readers[reader]
+                if not self.shared: self._drop()
+                self.cond.notify_all()
+
+class RenderService:
+    """Coalescing, caching render front end; thread-safe, independent of HTTP."""
+    def __init__(self, workers=4, cache_bytes=CACHE_MB * 2**20):
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="render")
+        self.cache = RenderCache(cache_bytes, 0)
+        self.inflight = {}; self.lock = threading.Lock()
+        self.requests = self.coalesced = 0
+
+    def key(self, p):
+        return cache_key("http", *(p[name] for name in PARAMS))
+
+    def open(self, p):
+        """(source, blocks) for validated params p; source is 'cache', 'coalesced' or 'render'."""
+        key = self.key(p)
+        with self.lock:
+            self.requests += 1
+            r = self.inflight.get(key)
+            blocks = r and r.join()
+            if blocks:
+                self.coalesced += 1; return "coalesced", blocks
+            data = self.cache.get(key)
+            if data is not None: return "cache", (data,)
+            r = self.inflight[key] = Render(self.cache.mem_limit // 2)  # the most the cache keeps of one render
+            blocks = r.join()
+        self.pool.submit(self._render, key, p, r)
+        return "render", blocks
+
+    def _render(self, key, p, r):
+        error = None
+        try:
+            with perf.span("http_render"):
+                for block in self.produce(p):
+                    if not r.add(block): break
+                else:
+                    if r.shared: self.cache.put(key, b"".join(r.blocks))
+        except Exception as e:
+            error = e
+        finally:
+            with self.lock:
+                if self.inflight.get(key) is r: del self.inflight[key]
+            r.finish(error)
+
+    def produce(self, p):
+        timing = {"farns_wpm": p["farns"], "weight": p["weight"], "jitter": p["jitter"], "seed": p["seed"]}
+        rows = build_rows(p["text"], p["wpm"], p["letsp"], p["wordsp"], **timing)
+        if rows.total > MAX_SECONDS * 1000:
+            raise TooLong(f"text renders to {rows.total / 1000:.0f} s, more than {MAX_SECONDS} s")
+        if p["format"] == "paris":
+            head = header(p["text"], p["wpm"], p["letsp"], p["wordsp"], **timing)
+            for s in iter_format_paris(rows, head, chunk_rows=4096): yield s.encode("utf-8")
+            return
+        sr = p["sr"]
+        yield wav_header(sum(frames(rows, sr)), sr)
+        yield from synth_iter(rows, p["freq"], sr, p["vol"], p["ramp"], chunk_frames=sr // 4)
+
+    def stats(self):
+        with self.lock:
+            return {"requests": self.requests, "coalesced": self.coalesced,
+                    "inflight": len(self.inflight), "cache": self.cache.stats()}
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ParisStudio/1"
+    service = None  # set by serve()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/stats": return self.send_json(self.service.stats())
+        if url.path == "/health": return self.send_json({"ok": True})
+        if url.path != "/render": return self.send_text(404, "not found")
+        self.render(parse_qs(url.query))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/render": return self.send_text(404, "not found")
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8", "replace")
+        if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+            raw = parse_qs(body)
+        else:
+            try: raw = json.loads(body or "{}")
+            except ValueError: return self.send_text(400, "body is not JSON")
+            if not isinstance(raw, dict): return self.send_text(400, "body must be a JSON object")
+        self.render(raw)
+
+    def render(self, raw):
+        try: p = parse_params(raw)
+        except ValueError as e: return self.send_text(400, str(e))
+        source, blocks = self.service.open(p)
+        blocks = iter(blocks)
+        try: first = next(blocks, b"")
+        except TooLong as e: return self.send_text(400, str(e))
+        except Exception as e: return self.send_text(500, f"render failed: {e}")
+        wav = p["format"] == "wav"
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav" if wav else "text/plain; charset=utf-8")
+        self.send_header("Content-Disposition", f"attachment; filename=\"morse.{p['format']}\"")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("X-Render", source)
+        if p["seed"] is not None: self.send_header("X-Seed", str(p["seed"]))
+        self.end_headers()
+        try:
+            for block in itertools.chain((first,), blocks):
+                if block: self.wfile.write(b"%X\r\n%s\r\n" % (len(block), block))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client left; the render still finishes for the cache
+        except Exception as e:
+            # headers are out: end the body without the terminating chunk so the client sees it truncated
+            self.log_error("render failed: %s", e); self.close_connection = True
+
+    def send_text(self, code, msg):
+        data = (msg + "\n").encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers(); self.wfile.write(data)
+
+    def send_json(self, obj):
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers(); self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        if not self.server.quiet: super().log_message(fmt, *args)
+
+def serve(host="127.0.0.1", port=8765, workers=4, cache_bytes=CACHE_MB * 2**20, quiet=False):
+    """A ThreadingHTTPServer bound to (host, port), not yet serving; port 0 picks a free port (server.server_port)."""
+    handler = type("BoundHandler", (Handler,), {"service": RenderService(workers, cache_bytes)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True; server.quiet = quiet
+    return server
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Serve Morse renders over HTTP.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("-j", "--workers", type=int, default=4, help="concurrent renders")
+    p.add_argument("--cache-mb", type=float, default=CACHE_MB, help="in-memory result cache size")
+    p.add_argument("-q", "--quiet", action="store_true", help="no request log")
+    a = p.parse_args(argv)
+    server = serve(a.host, a.port, a.workers, int(a.cache_mb * 2**20), a.quiet)
+    print(f"serving on http://{a.host}:{server.server_port}/render", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import sys, math, time, shlex, struct, threading
+
+import pytest
+
+from paris import audio
+from paris.audio import synth, synth_iter, synth_parallel, encode_mp3
+from paris.morse import build_rows
+from worker import Cancelled
+
+def reference_synth(rows, freq, sr, vol, ramp):
+    # the original per-sample loop synth() replaced
+    ramp_s = int(sr * (ramp / 1000))
+    b = bytearray(); tp = 0
+    for dur, val in rows:
+        n = int(sr * (dur / 1000))
+        if val:
+            for i in range(n):
+                if ramp_s > 0 and i < ramp_s: env = 0.5 * (1 - math.cos(math.pi * i / ramp_s))
+                elif ramp_s > 0 and n - i <= ramp_s: env = 0.5 * (1 - math.cos(math.pi * (n - i) / ramp_s))
+                else: env = 1
+                s = vol * env * math.sin(2 * math.pi * freq * tp / sr)
+                b += struct.pack("<h", int(32767 * max(-1, min(1, s))))
+                tp += 1
+        else:
+            b += b"\x00\x00" * n; tp += n
+    return bytes(b), tp
+
+TONES = [(700, 8000, 0.5, 5), (600, 44100, 1.0, 0), (733.3, 22050, 0.8, 3)]  # the last has no short phase period
+ROWS = build_rows("PARIS CQ 73", 25, 150, 350, jitter=10, seed=3, pre=20, post=20)
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def engine(request, monkeypatch):
+    if request.param and not audio.HAVE_NUMPY: pytest.skip("numpy not installed")
+    monkeypatch.setattr(audio, "HAVE_NUMPY", request.param)
+    audio.element_cache_clear()
+    yield
+    audio.element_cache_clear()
+
+@pytest.mark.parametrize("tone", TONES)
+def test_synth_matches_reference_within_one_lsb(engine, tone):
+    pcm, n = synth(ROWS, *tone)
+    ref, ref_n = reference_synth(list(ROWS), *tone)
+    assert n == ref_n and len(pcm) == len(ref)
+    got = struct.unpack(f"<{n}h", pcm); want = struct.unpack(f"<{n}h", ref)
+    assert max(abs(a - b) for a, b in zip(got, want)) <= 1
+
+@pytest.mark.parametrize("tone", TONES)
+@pytest.mark.parametrize("chunk_frames", [1, 1000, 1 << 20])
+def test_synth_iter_equals_synth(engine, tone, chunk_frames):
+    blocks = list(synth_iter(ROWS, *tone, chunk_frames=chunk_frames))
+    assert all(len(b) == 2 * chunk_frames for b in blocks[:-1])
+    assert b"".join(blocks) == synth(ROWS, *tone)[0]
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_synth_parallel_equals_synth(workers):
+    rows = build_rows("CQ CQ DE KF5JEX " * 20, 30, 120, 280)
+    assert synth_parallel(rows, 700, 8000, 0.5, 5, workers=workers) == synth(rows, 700, 8000, 0.5, 5)
+
+# stands in for ffmpeg/lame: copies stdin to {out} as it arrives
+COPY_ENCODER = [sys.executable, "-c",
+                "import sys\n"
+                "with open(sys.argv[1], 'wb') as f:\n"
+                "    for b in iter(lambda: sys.stdin.buffer.read(4096), b''): f.write(b); f.flush()",
+                "{out}"]
+
+@pytest.fixture
+def encoder(monkeypatch):
+    monkeypatch.setenv("PARIS_MP3_ENCODER", shlex.join(COPY_ENCODER))
+
+def test_encode_mp3_streams_into_encoder(encoder, tmp_path):
+    out = tmp_path / "a.mp3"
+    blocks = [bytes([i]) * 4096 for i in range(8)]
+    encode_mp3(iter(blocks), 8000, str(out))
+    assert out.read_bytes() == b"".join(blocks)
+
+def test_encode_mp3_cancel_kills_encoder_and_removes_output(encoder, tmp_path):
+    out = tmp_path / "a.mp3"
+    def chunks():
+        yield b"\1" * 65536
+        raise Cancelled()
+    with pytest.raises(Cancelled):
+        encode_mp3(chunks(), 8000, str(out))
+    assert not out.exists()
+
+def test_encode_mp3_reports_encoder_failure(monkeypatch, tmp_path):
+    out = tmp_path / "a.mp3"
+    monkeypatch.setenv("PARIS_MP3_ENCODER", shlex.join([sys.executable, "-c", "import sys; open(sys.argv[1], 'wb'); sys.exit('no codec')", "{out}"]))
+    with pytest.raises(RuntimeError, match="no codec"):
+        encode_mp3([b"\0" * 1024], 8000, str(out))
+    assert not out.exists()
+
+def copy_player(out):
+    # stands in for aplay/ffplay: writes what it is sent to out
+    return [sys.executable, "-c", "import sys, shutil; shutil.copyfileobj(sys.stdin.buffer, open(sys.argv[1], 'wb'))", str(out)]
+
+def test_player_plays_all_blocks(tmp_path):
+    out = tmp_path / "played.pcm"; done = threading.Event()
+    p = audio.Player(copy_player(out))
+    blocks = [bytes([i]) * 2000 for i in range(10)]
+    p.play(iter(blocks), 8000, on_done=done.set)
+    assert done.wait(10)
+    assert not p.playing and p.frames == 10000 and p.proc is None
+    assert out.read_bytes() == b"".join(blocks)
+
+def test_player_stop_ends_playback(tmp_path):
+    closed = threading.Event()
+    def endless():
+        try:
+            while True: yield bytes(1600)
+        finally:
+            closed.set()
+    # reads nothing, so the pipe fills and the player thread blocks in write()
+    p = audio.Player([sys.executable, "-c", "import time; time.sleep(60)"])
+    p.play(endless(), 8000)
+    deadline = time.monotonic() + 10
+    while p.proc is None and time.monotonic() < deadline: time.sleep(0.01)
+    proc = p.proc
+    t = time.monotonic(); p.stop()
+    assert time.monotonic() - t < 1.5
+    assert not p.playing and proc.poll() is not None
+    assert closed.wait(5)
+
+def test_element_cache_is_bounded_by_bytes(monkeypatch):
+    monkeypatch.setattr(audio, "_elements", audio._ElementCache(1 << 20, len))
+    monkeypatch.setattr(audio, "ELEMENT_MAX_BYTES", 1 << 16)
+    rows = build_rows("CQ CQ DE KF5JEX " * 10, 5, 720, 1680, jitter=20, seed=1)
+    pcm, _ = synth(rows, 700, 44100, 0.5, 5)
+    assert synth(rows, 700, 44100, 0.5, 5)[0] == pcm  # warm
+    info = audio.element_cache_info()
+    assert 0 < info["bytes"] <= 1 << 20 and info["misses"] > 0
+    assert all(len(v) <= 1 << 16 for v in audio._elements.items.values())
+    long = audio.tone(44100, 0, 700, 44100, 0.5, 220)  # one second: over the per-tone cap
+    assert len(long) == 88200 and (44100, 0, 700, 44100, 0.5, 220, audio.HAVE_NUMPY) not in audio._elements.items
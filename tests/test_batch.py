@@ -0,0 +1,34 @@
+import json
+
+import batch
+from paris.parisfile import read_paris
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True); path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def test_renders_sweep(tmp_path):
+    words = write(tmp_path / "in" / "words.txt", "PARIS\nCQ\n")
+    out = tmp_path / "out"
+    assert batch.main([words, "-o", str(out), "--wpm", "15", "20", "--per-line", "--format", "paris", "-j", "1"]) == 0
+    assert sorted(p.name for p in out.iterdir()) == [
+        "words_0_w15_l300_s700_f700.paris", "words_0_w20_l300_s700_f700.paris",
+        "words_1_w15_l300_s700_f700.paris", "words_1_w20_l300_s700_f700.paris"]
+    assert read_paris(str(out / "words_1_w20_l300_s700_f700.paris"))[1][0] == "# Word: CQ"
+
+def test_duplicate_names_fail(tmp_path, capsys):
+    a = write(tmp_path / "a" / "words.txt", "PARIS")
+    b = write(tmp_path / "b" / "words.txt", "CQ")
+    out = tmp_path / "out"
+    assert batch.main([a, b, "-o", str(out), "--format", "paris", "-j", "1"]) == 1
+    assert "duplicate output names: words" in capsys.readouterr().err
+    assert not list(out.iterdir())
+
+def test_manifest_file_entries_honour_per_line(tmp_path):
+    write(tmp_path / "lists" / "calls.txt", "KF5JEX\nW1AW\n")
+    manifest = write(tmp_path / "m.json", json.dumps([{"file": "lists/calls.txt"}, {"name": "greeting", "text": "73"}]))
+    names = [n for n, _ in batch.read_texts(manifest, per_line=True)]
+    assert names == ["calls_0", "calls_1", "greeting"]
+    # the same file given again directly collides with the manifest entry
+    out = tmp_path / "out"
+    assert batch.main([manifest, str(tmp_path / "lists" / "calls.txt"), "-o", str(out), "-j", "1"]) == 1
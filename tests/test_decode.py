@@ -0,0 +1,75 @@
+import random, struct
+
+import pytest
+
+from paris import decode
+from paris.audio import synth_iter, write_wav
+from paris.morse import build_rows
+from paris.parisfile import write_paris
+from paris.utils import dot_ms
+
+TEXT = "CQ CQ DE KF5JEX PARIS 73"
+# (wpm, letter space ms, word space ms, build_rows keyword arguments), spacing standard at wpm unless stretched
+CASES = [
+    (8, None, None, {}),
+    (20, None, None, {}),
+    (35, None, None, {}),
+    (25, None, None, {"farns_wpm": 12}),
+    (18, None, None, {"jitter": 8, "seed": 4}),
+    (22, None, None, {"weight": 3.6}),
+]
+
+def spacing(wpm, l, w):
+    return l or 3 * dot_ms(wpm), w or 7 * dot_ms(wpm)
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def engine(request, monkeypatch):
+    if request.param and not decode.HAVE_NUMPY: pytest.skip("numpy not installed")
+    monkeypatch.setattr(decode, "HAVE_NUMPY", request.param)
+
+def wav(tmp_path, rows, sr=8000, noise=0.0, freq=700):
+    path = str(tmp_path / "t.wav")
+    blocks = synth_iter(rows, freq, sr, 0.6, 5)
+    if noise:
+        rng = random.Random(1)
+        def noisy(blocks):
+            for b in blocks:
+                s = struct.unpack(f"<{len(b) // 2}h", b)
+                yield struct.pack(f"<{len(s)}h", *(max(-32768, min(32767, int(v + rng.gauss(0, noise * 32767)))) for v in s))
+        blocks = noisy(blocks)
+    write_wav(path, blocks, sr)
+    return path
+
+@pytest.mark.parametrize("wpm, l, w, kw", CASES)
+def test_decode_timeline(wpm, l, w, kw):
+    r = decode.decode_timeline(build_rows(TEXT, wpm, *spacing(wpm, l, w), **kw))
+    assert r["text"] == TEXT
+    if not kw.get("jitter"): assert r["char_wpm"] == pytest.approx(wpm, rel=0.02)
+    if "farns_wpm" in kw: assert r["farns_wpm"] == pytest.approx(kw["farns_wpm"], rel=0.05)
+    if "weight" in kw: assert r["weight"] == pytest.approx(kw["weight"], rel=0.05)
+
+@pytest.mark.parametrize("wpm, l, w, kw", CASES)
+def test_decode_wav(engine, tmp_path, wpm, l, w, kw):
+    rows = build_rows(TEXT, wpm, *spacing(wpm, l, w), **kw)
+    r = decode.decode_wav(wav(tmp_path, rows))
+    assert r["text"] == TEXT
+    if not kw.get("jitter"): assert r["char_wpm"] == pytest.approx(wpm, rel=0.05)
+
+def test_decode_noisy_wav(engine, tmp_path):
+    rows = build_rows(TEXT, 20, *spacing(20, None, None))
+    assert decode.decode_wav(wav(tmp_path, rows, noise=0.1))["text"] == TEXT
+
+def test_decode_paris_file(tmp_path):
+    path = str(tmp_path / "t.paris")
+    write_paris(path, build_rows(TEXT, 15, *spacing(15, None, None)))
+    assert decode.decode_file(path)["text"] == TEXT
+
+def test_unknown_code_and_empty_timeline():
+    r = decode.decode_runs([60, 60, 180, 60, 60, 60, 60, 60, 60, 60, 60, 60, 60, 60, 60], [1, 0] * 7 + [1])
+    assert r["text"] == decode.UNKNOWN  # eight elements: no such character
+    assert decode.decode_timeline([])["text"] == ""
+
+def test_one_mark_length_is_ambiguous():
+    # with every mark the same length there is nothing to tell dits from dahs by
+    assert decode.decode_timeline(build_rows("T", 20, 180, 420))["text"] == "E"
+    assert decode.decode_timeline(build_rows("TE", 20, 180, 420))["text"] == "TE"
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from paris.morse import MORSE, Encoder, build_rows, resolve_seed
+from paris.parisfile import header, header_params
+from paris.utils import dot_ms
+
+def reference_build_rows(text, wpm, letsp_ms, wordsp_ms):
+    # the original per-element loop build_rows() replaced
+    d_dot = dot_ms(wpm); d_dash = 3 * d_dot
+    rows = []
+    for wi, w in enumerate(text.strip().split()):
+        for ci, ch in enumerate(w):
+            code = MORSE.get(ch.upper())
+            if not code: continue
+            for ei, e in enumerate(code):
+                rows.append((int(d_dot if e == "." else d_dash), 1))
+                if ei < len(code) - 1: rows.append((int(d_dot), 0))
+            if ci < len(w) - 1: rows.append((int(letsp_ms), 0))
+        if wi < len(text.split()) - 1: rows.append((int(wordsp_ms), 0))
+    return rows
+
+TEXTS = ["PARIS", "cq cq de kf5jex", "  Hello,  World!\n\tQRZ?  ", "A?B ?? 73 ß ı", "", "   ", "*", "E E  E"]
+ALPHABET = "ABCXYZ0189abcxyz?!,.*ßı  \t\n"
+
+def random_texts(n, seed=0):
+    rng = random.Random(seed)
+    return [("".join(rng.choice(ALPHABET) for _ in range(rng.randrange(40)))) for _ in range(n)]
+
+@pytest.mark.parametrize("wpm, letsp, wordsp", [(20, 180, 420), (13, 277.7, 1000.9), (5, 0, 0)])
+def test_build_rows_matches_reference(wpm, letsp, wordsp):
+    for text in TEXTS + random_texts(200):
+        assert build_rows(text, wpm, letsp, wordsp) == reference_build_rows(text, wpm, letsp, wordsp), repr(text)
+
+def test_warm_encoder_matches_cold_build_rows():
+    enc = Encoder(max_words=50)
+    texts = TEXTS + random_texts(100, seed=1)
+    for i, text in enumerate(texts + texts[::-1]):
+        wpm = (20, 25)[i % 7 == 0]  # changing the timing drops the word table
+        kw = {"farns_wpm": 10, "jitter": 5, "seed": i} if i % 5 == 0 else {}
+        assert enc.build(text, wpm, 180, 420, **kw) == build_rows(text, wpm, 180, 420, **kw), repr(text)
+
+def test_resolved_seed_reproduces_jitter():
+    seed = resolve_seed(10)
+    assert isinstance(seed, int)
+    tl = build_rows("CQ DE KF5JEX", 20, 180, 420, jitter=10, seed=seed)
+    assert build_rows("CQ DE KF5JEX", 20, 180, 420, jitter=10, seed=seed) == tl
+    head = header("CQ DE KF5JEX", 20, 180, 420, jitter=10, seed=seed)
+    assert f"seed {seed} " in "\n".join(head)
+    assert build_rows("CQ DE KF5JEX", **header_params(head)) == tl
+
+def test_resolve_seed_keeps_given_seed():
+    assert resolve_seed(10, 0) == 0
+    assert resolve_seed(0) is None
+
+def test_header_records_pre_and_post_delay():
+    tl = build_rows("PARIS", 20, 180, 420, farns_wpm=10, jitter=5, seed=2, pre=250, post=400)
+    head = header("PARIS", 20, 180, 420, farns_wpm=10, jitter=5, seed=2, pre=250, post=400)
+    assert build_rows("PARIS", **header_params(head)) == tl
+    assert header_params(header("PARIS", 20, 180, 420)).keys().isdisjoint({"pre", "post"})
@@ -0,0 +1,31 @@
+import pytest
+
+from paris.morse import build_rows
+from paris.parisfile import header, header_params, read_paris, write_paris, convert_paris
+
+TEXTS = ["PARIS", "CQ CQ DE KF5JEX\nTHE QUICK BROWN FOX\r\n\n  0123456789  \n"]
+
+@pytest.mark.parametrize("binary", [False, True])
+@pytest.mark.parametrize("text", TEXTS)
+def test_round_trip(tmp_path, text, binary):
+    tl = build_rows(text, 20, 180, 420, jitter=5, seed=7)
+    head = header(text, 20, 180, 420, jitter=5, seed=7)
+    path = str(tmp_path / "t.paris")
+    write_paris(path, tl, head, binary=binary)
+    got, got_head = read_paris(path)
+    assert got == tl
+    assert got_head == head
+    assert build_rows(text, **header_params(got_head)) == tl
+
+def test_header_is_one_line_per_field():
+    head = header(TEXTS[1], 20, 180, 420)
+    assert head[0] == "# Word: CQ CQ DE KF5JEX THE QUICK BROWN FOX 0123456789"
+    assert all("\n" not in line and "\r" not in line for line in head)
+
+def test_convert_is_lossless(tmp_path):
+    tl = build_rows(TEXTS[1], 25, 144, 336)
+    head = header(TEXTS[1], 25, 144, 336)
+    src, mid, dst = (str(tmp_path / n) for n in ("a.paris", "b.paris", "c.paris"))
+    write_paris(src, tl, head)
+    convert_paris(src, mid, binary=True); convert_paris(mid, dst, binary=False)
+    with open(src, "rb") as a, open(dst, "rb") as b: assert a.read() == b.read()
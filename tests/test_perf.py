@@ -0,0 +1,23 @@
+import pstats, threading
+
+from paris import perf
+
+def test_profile_op_selects_the_profiled_op(tmp_path, monkeypatch):
+    path = str(tmp_path / "out.prof")
+    monkeypatch.setattr(perf, "PROFILE_PATH", path)
+    monkeypatch.setattr(perf, "PROFILE_OP", "export_wav")
+    with perf.op("preview"): pass
+    assert perf.PROFILE_PATH == path
+    with perf.op("export_wav"): sorted(range(10))
+    assert perf.PROFILE_PATH is None
+    assert any(f[2] == "<built-in method builtins.sorted>" for f in pstats.Stats(path).stats)
+
+def test_op_iter_profiles_the_consuming_thread(tmp_path, monkeypatch):
+    path = str(tmp_path / "out.prof")
+    monkeypatch.setattr(perf, "PROFILE_PATH", path)
+    monkeypatch.setattr(perf, "PROFILE_OP", None)
+    def blocks():
+        for i in range(3): yield bytes(sorted(range(i)))
+    t = threading.Thread(target=lambda: list(perf.op_iter("play", blocks())))
+    t.start(); t.join()
+    assert any(f[2] == "blocks" for f in pstats.Stats(path).stats)
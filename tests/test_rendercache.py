@@ -0,0 +1,27 @@
+from paris import rendercache
+from paris.rendercache import RenderCache, cache_key
+
+def test_cache_key_depends_on_version(monkeypatch):
+    a = cache_key("studio", "PARIS", 20)
+    monkeypatch.setattr(rendercache, "CACHE_VERSION", rendercache.CACHE_VERSION + 1)
+    assert cache_key("studio", "PARIS", 20) != a
+
+def test_memory_and_disk_tiers(tmp_path):
+    c = RenderCache(1 << 20, 1 << 20, str(tmp_path))
+    c.put("k", b"\1\2" * 100)
+    assert c.size("k") == 200 and c.get("k") == b"\1\2" * 100
+    c.set_limits(mem_limit=0)
+    assert c.size("k") == 200 and c.get("k") == b"\1\2" * 100  # from disk
+    assert c.size("missing") is None and c.get("missing") is None
+
+def test_stream_survives_trim_after_open(tmp_path, monkeypatch):
+    c = RenderCache(0, 1 << 20, str(tmp_path))
+    c.put("k", b"\1\2" * 100)
+    real_open = open
+    def open_then_trim(path, *a, **kw):
+        f = real_open(path, *a, **kw)
+        rendercache.os.unlink(path)  # a concurrent _trim_disk between open and utime
+        return f
+    monkeypatch.setattr(rendercache, "open", open_then_trim, raising=False)
+    assert b"".join(c.stream("k", lambda: iter(()))) == b"\1\2" * 100
+    assert c.disk_hits == 1
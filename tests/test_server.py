@@ -0,0 +1,74 @@
+import json, time, threading
+from http.client import HTTPConnection
+from urllib.parse import urlencode
+
+import pytest
+
+import server
+from paris.morse import build_rows
+from paris.audio import synth, wav_header
+
+@pytest.fixture
+def srv():
+    s = server.serve(port=0, workers=2, quiet=True)
+    threading.Thread(target=s.serve_forever, args=(0.05,), daemon=True).start()
+    yield s
+    s.shutdown(); s.server_close()
+
+def get(s, **params):
+    c = HTTPConnection("127.0.0.1", s.server_port, timeout=30)
+    c.request("GET", "/render?" + urlencode(params))
+    r = c.getresponse()
+    return r.status, r.getheader("X-Render"), r.read()
+
+def test_renders_same_audio_as_synth(srv):
+    status, source, body = get(srv, text="PARIS", wpm=20, sr=8000)
+    assert status == 200 and source == "render"
+    pcm, n = synth(build_rows("PARIS", 20, 300, 700), 700, 8000, 0.6, 5)
+    assert body == wav_header(n, 8000) + pcm
+    assert get(srv, text="PARIS", wpm=20, sr=8000)[1:] == ("cache", body)
+
+def test_concurrent_requests_share_one_render(srv, monkeypatch):
+    service = srv.RequestHandlerClass.service
+    gate = threading.Event(); produce = service.produce
+    def gated(p):
+        it = produce(p)
+        yield next(it); gate.wait(10); yield from it
+    monkeypatch.setattr(service, "produce", gated)
+    results = []
+    first = threading.Thread(target=lambda: results.append(get(srv, text="CQ DE KF5JEX")))
+    first.start()
+    while not service.inflight: time.sleep(0.001)
+    second = threading.Thread(target=lambda: results.append(get(srv, text="CQ DE KF5JEX")))
+    second.start()
+    while service.stats()["coalesced"] == 0: time.sleep(0.001)
+    gate.set(); first.join(); second.join()
+    assert sorted(source for _, source, _ in results) == ["coalesced", "render"]
+    assert results[0][2] == results[1][2] and results[0][0] == 200
+    assert service.stats()["requests"] == 2
+
+@pytest.mark.parametrize("params", [
+    {"wpm": "nan"}, {"vol": "inf"}, {"freq": "-inf"}, {"farns": "-5"}, {"farns": "0"},
+    {"jitter": "5", "seed": "-1"}, {"wpm": "abc"}, {"sr": "1e400"}, {"format": "mp3"},
+    {"text": "E " * 100, "wpm": "5", "wordsp": "60000"},  # over MAX_SECONDS
+])
+def test_bad_params_are_400(srv, params):
+    status, _, body = get(srv, **params)
+    assert status == 400, body
+
+def test_stats(srv):
+    get(srv, text="E", sr=8000)
+    c = HTTPConnection("127.0.0.1", srv.server_port, timeout=30)
+    c.request("GET", "/stats")
+    assert json.loads(c.getresponse().read())["requests"] == 1
+
+def test_render_past_keep_is_not_shared():
+    r = server.Render(keep=10)
+    a = r.join()
+    assert r.add(b"x" * 8) and r.shared
+    t = threading.Thread(target=lambda: [r.add(b"y" * 8) for _ in range(5)] and r.finish())
+    t.start()
+    assert next(a) == b"x" * 8
+    got = b"".join(a); t.join()
+    assert got == b"y" * 40
+    assert r.join() is None and r.blocks == []
@@ -0,0 +1,57 @@
+import random
+from array import array
+
+import pytest
+
+from paris import timeline
+from paris.timeline import MorseTimeline, pack_bits, unpack_bits
+
+ROWS = [(100, 1), (100, 0), (300, 1), (300, 0), (0, 1), (700, 0), (100, 1)]
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def engine(request, monkeypatch):
+    if request.param and not timeline.HAVE_NUMPY: pytest.skip("numpy not installed")
+    monkeypatch.setattr(timeline, "HAVE_NUMPY", request.param)
+
+@pytest.mark.parametrize("n", [0, 1, 7, 8, 9, 1000])
+def test_pack_bits_round_trip(engine, n):
+    vals = bytes(random.Random(n).getrandbits(1) for _ in range(n))
+    bits = pack_bits(vals)
+    assert len(bits) == (n + 7) // 8
+    assert all((bits[i >> 3] >> (i & 7)) & 1 == vals[i] for i in range(n))
+    assert unpack_bits(bits, n) == vals
+
+def test_rows_round_trip(engine):
+    tl = MorseTimeline.from_rows(ROWS)
+    assert list(tl) == ROWS and tl == ROWS and len(tl) == 7 and tl.total == 1600
+    assert tl.values() == bytes(v for _, v in ROWS)
+    assert MorseTimeline.from_bits(tl.durations, tl.bits) == tl
+    assert MorseTimeline.from_rows(tl) is tl
+    assert not MorseTimeline() and MorseTimeline().total == 0
+
+def test_offsets(engine):
+    tl = MorseTimeline.from_rows(ROWS)
+    assert list(tl.offsets) == [0, 100, 200, 500, 800, 800, 1500, 1600]
+    assert list(tl.on_offsets) == [0, 100, 100, 400, 400, 400, 400, 500]
+
+def test_on_time_and_index_at(engine):
+    tl = MorseTimeline.from_rows(ROWS)
+    assert [tl.on_time(t) for t in (-5, 0, 50, 100, 150, 250, 600, 1550, 1600, 9999)] == \
+           [0, 0, 50, 100, 100, 150, 400, 450, 500, 500]
+    assert [tl.index_at(t) for t in (-5, 0, 99, 100, 500, 800, 1599, 9999)] == [0, 0, 0, 1, 3, 5, 6, 6]
+    with pytest.raises(IndexError): MorseTimeline().index_at(0)
+
+def test_indexing_and_slicing(engine):
+    tl = MorseTimeline.from_rows(ROWS)
+    assert tl[0] == (100, 1) and tl[-1] == (100, 1) and tl[3] == (300, 0)
+    with pytest.raises(IndexError): tl[7]
+    assert tl[2:5] == ROWS[2:5] and tl[::2] == ROWS[::2] and tl[5:2] == []
+    assert isinstance(tl[1:], MorseTimeline)
+
+def test_buffers_are_zero_copy():
+    tl = MorseTimeline.from_rows(ROWS)
+    assert memoryview(tl.durations).format == "I" and bytes(tl.durations) == array("I", [d for d, _ in ROWS]).tobytes()
+    assert bytes(memoryview(tl.bits)) == bytes(pack_bits([v for _, v in ROWS]))
+
+def test_length_mismatch():
+    with pytest.raises(ValueError): MorseTimeline([1, 2], b"\1")
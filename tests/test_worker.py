@@ -0,0 +1,63 @@
+import time, threading
+
+from worker import RenderWorker, Exports, Cancelled, tracked
+
+def drain(w, until, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not until() and time.monotonic() < deadline:
+        w.poll(); time.sleep(0.005)
+    assert until()
+
+def test_latest_worker_replaces_older_jobs():
+    w = RenderWorker(); got = []; go = threading.Event()
+    w.submit(lambda job: go.wait(10) or job.check(), on_done=lambda r: got.append("first"),
+             on_cancel=lambda _: got.append("first cancelled"))
+    w.submit(lambda job: "second", on_done=got.append)
+    go.set()
+    drain(w, lambda: len(got) == 2)
+    assert sorted(got) == ["first cancelled", "second"]
+
+def test_queued_worker_runs_every_job_in_order():
+    w = RenderWorker(latest=False); got = []
+    def slow(job, name):
+        time.sleep(0.05); job.check(); return name
+    for name in ("first", "second", "third"): w.submit(slow, name, on_done=got.append)
+    drain(w, lambda: len(got) == 3)
+    assert got == ["first", "second", "third"]
+
+class Label:
+    text = ""
+    def config(self, text): self.text = text
+
+def test_exports_queue_and_cancel(tmp_path):
+    shown = []; status = Label()
+    ex = Exports({}, status, lambda title, msg: shown.append(msg), lambda title, msg: shown.append("error " + msg))
+    go = threading.Event()
+    def write(path, wait=False):
+        def run(job):
+            with open(path, "wb") as f:
+                for block in tracked(iter([b"a", b"b"]), job, 2):
+                    if wait: go.wait(10)
+                    f.write(block)
+            return f"saved {path.name}"
+        return run
+    ex.submit("WAV", str(tmp_path / "a.wav"), write(tmp_path / "a.wav"))
+    ex.submit("MP3", str(tmp_path / "b.mp3"), write(tmp_path / "b.mp3"))
+    drain(ex, lambda: len(shown) == 2)
+    assert shown == ["saved a.wav", "saved b.mp3"] and ex.pending == 0
+
+    ex.submit("WAV", str(tmp_path / "c.wav"), write(tmp_path / "c.wav", wait=True))
+    ex.submit("MP3", str(tmp_path / "d.mp3"), write(tmp_path / "d.mp3"))
+    assert "1 more queued" in status.text
+    ex.cancel(); go.set()
+    drain(ex, lambda: ex.pending == 0)
+    assert len(shown) == 2 and "cancelled" in status.text
+    assert not (tmp_path / "c.wav").exists() and not (tmp_path / "d.mp3").exists()
+
+def test_exports_report_errors():
+    shown = []
+    ex = Exports({}, Label(), shown.append, lambda title, msg: shown.append(msg))
+    def fail(job): raise OSError("disk full")
+    ex.submit("WAV", "/nonexistent/x.wav", fail)
+    drain(ex, lambda: shown)
+    assert shown == ["WAV export failed:\ndisk full"]
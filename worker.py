@@ -0,0 +1,134 @@
+import os, queue, threading
+
+class Cancelled(Exception):
+    pass
+
+class Job:
+    __slots__ = ("worker", "gen", "fn", "args", "on_done", "on_error", "on_progress", "on_cancel")
+
+    def __init__(self, worker, gen, fn, args, on_done, on_error, on_progress, on_cancel):
+        self.worker = worker; self.gen = gen; self.fn = fn; self.args = args
+        self.on_done = on_done; self.on_error = on_error; self.on_progress = on_progress; self.on_cancel = on_cancel
+
+    def cancelled(self):
+        return self.gen != self.worker.gen
+
+    def check(self):
+        if self.cancelled(): raise Cancelled()
+
+    def progress(self, frac):
+        self.worker.results.put((self, "progress", frac))
+
+class RenderWorker:
+    """One background thread running render jobs, newest first.
+
+    submit() bumps the generation; queued jobs from older generations are
+    dropped and a running one sees job.cancelled() turn true. With
+    latest=False jobs queue up and run in order instead, and only cancel()
+    stops them. Results and progress go through a queue that poll() drains
+    on the Tk main thread, so callbacks may touch widgets.
+    """
+    def __init__(self, name="render", latest=True):
+        self.gen = 0; self.latest = latest
+        self.jobs = queue.Queue(); self.results = queue.Queue()
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None, on_cancel=None):
+        """Run fn(job, *args) on the worker thread; on_done(result) / on_error(exc) / on_progress(frac) run in poll().
+
+        on_cancel(None) runs in poll() if the job is dropped or stops with Cancelled.
+        """
+        if self.latest: self.gen += 1
+        self.jobs.put(Job(self, self.gen, fn, args, on_done, on_error, on_progress, on_cancel))
+        return self.gen
+
+    def cancel(self):
+        """Cancel the running job and every queued one."""
+        self.gen += 1
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job.cancelled():
+                self.results.put((job, "cancelled", None)); continue
+            try:
+                self.results.put((job, "done", job.fn(job, *job.args)))
+            except Cancelled:
+                self.results.put((job, "cancelled", None))
+            except Exception as e:
+                self.results.put((job, "error", e))
+
+    def poll(self):
+        """Dispatch finished jobs and progress; call from the Tk main thread (e.g. every 50 ms via after())."""
+        while True:
+            try: job, kind, value = self.results.get_nowait()
+            except queue.Empty: return
+            if kind != "cancelled" and job.cancelled(): continue
+            cb = {"done": job.on_done, "error": job.on_error, "progress": job.on_progress, "cancelled": job.on_cancel}[kind]
+            if cb: cb(value)
+
+class Exports:
+    """File exports for a Tk app, one at a time in the order asked for, with a progress bar and status label.
+
+    A new export queues behind the running one rather than replacing it.
+    cancel() stops the running export and drops the queued ones; the
+    running one removes its partial file, and each reports in the status
+    line. info/error are messagebox.showinfo/showerror or the like.
+    """
+    def __init__(self, progress, status, info, error, name="export"):
+        self.worker = RenderWorker(name, latest=False)
+        self.progress = progress; self.status = status; self.info = info; self.error = error
+        self.pending = 0; self.shown = ("", "")
+
+    def submit(self, what, path, fn, on_done=None):
+        """Export what to path by running fn(job) -> message on the worker; on_done() runs before the message is shown."""
+        def progress(frac):
+            self.progress["value"] = 100 * frac; self.show(what, f" {100 * frac:.0f}%")
+        def settle():
+            self.pending -= 1; self.progress["value"] = 0; self.status.config(text="")
+        def done(msg):
+            settle()
+            if on_done: on_done()
+            self.info("Saved", msg)
+        def failed(e):
+            settle(); self.error("Error", f"{what} export failed:\n{e}")
+        def cancelled(_):
+            settle(); self.status.config(text=f"{what} export to {os.path.basename(path)} cancelled.")
+        def run(job):
+            try: return fn(job)
+            except Cancelled:
+                if os.path.exists(path): os.remove(path)
+                raise
+        self.pending += 1
+        if self.pending == 1: self.progress["value"] = 0; self.show(what)
+        else: self.show(*self.shown)
+        self.worker.submit(run, on_done=done, on_error=failed, on_progress=progress, on_cancel=cancelled)
+
+    def show(self, what, pct=""):
+        self.shown = (what, pct)
+        more = f", {self.pending - 1} more queued" if self.pending > 1 else ""
+        self.status.config(text=f"Exporting {what}...{pct}{more} (Esc to cancel)")
+
+    def cancel(self):
+        if self.pending: self.worker.cancel()
+
+    def poll(self):
+        self.worker.poll()
+
+def poll_every(tk, workers, ms=50):
+    """Drain the workers' (or Exports') results on the Tk main thread every ms milliseconds."""
+    def tick():
+        for w in workers: w.poll()
+        tk.after(ms, tick)
+    tick()
+
+def tracked(chunks, job, total):
+    """Pass PCM blocks through, reporting progress as a fraction of total bytes and stopping when job is cancelled."""
+    done = 0; last = -1
+    for block in chunks:
+        job.check()
+        done += len(block)
+        pct = int(100 * done / total) if total else 100
+        if pct != last:
+            job.progress(pct / 100); last = pct
+        yield block